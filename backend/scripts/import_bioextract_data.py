@@ -19,7 +19,7 @@ import csv
 import sys
 import argparse
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, Iterator, List, Any, Optional
 from datetime import datetime
 
 # Add parent directory to path for imports
@@ -38,12 +38,139 @@ DB_NAME = os.getenv("MONGODB_DB_NAME", os.getenv("MONGODB_DB", "biomedical_platf
 # 数据文件路径（相对于项目根目录）
 DATA_DIR = Path(__file__).parent.parent.parent / "src" / "features" / "bioextract" / "data"
 
+# 批量插入大小
+DELIVERY_BATCH_SIZE = 1000
+MICRO_BATCH_SIZE = 1000
+TAGS_BATCH_SIZE = 5000
+
+# 解析线程与插入协程之间的最大待插入批次数
+QUEUE_MAXSIZE = 4
+
+# sync_and_aggregate.py 的增量同步指纹集合
+SYNC_STATE_COLLECTION = "_sync_state"
+
+
+# =============================================
+# CSV 解析（同步，运行于工作线程）
+# =============================================
+
+def _clean_fieldnames(fieldnames: List[str]) -> List[str]:
+    """修复 Header: "paper_id (论文ID)" -> "paper_id" """
+    return [f.split(' (')[0].strip() for f in fieldnames]
+
+
+def _row_to_doc(row: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """构建文档，并对数值字段做类型转换"""
+    doc = {}
+    for key, value in row.items():
+        if not key: continue
+        
+        val = value.strip() if value else None
+        
+        # 数值字段转换
+        if key == 'system_index':
+            doc[key] = int(val) if val and val.isdigit() else 0
+        elif key.endswith('_tokens'):
+            doc[key] = int(val) if val and val.isdigit() else 0
+        else:
+            doc[key] = val
+    return doc
+
+
+def _parse_delivery_csv(csv_path: Path) -> Iterator[List[Dict[str, Any]]]:
+    """解析 delivery-qwen.csv，按批次产出文档"""
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        
+        # 检查是否空文件
+        if not reader.fieldnames:
+            raise ValueError("Empty file")
+        
+        reader.fieldnames = _clean_fieldnames(reader.fieldnames)
+        print(f"   Columns: {len(reader.fieldnames)}")
+        
+        batch = []
+        for row in reader:
+            # 过滤空行或无效行
+            if not any(row.values()):
+                continue
+            
+            if not row.get('paper_id'):
+                continue
+            
+            batch.append(_row_to_doc(row))
+            if len(batch) >= DELIVERY_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _parse_micro_csv(csv_path: Path) -> Iterator[List[Dict[str, Any]]]:
+    """解析 micro_feat.csv，按批次产出文档"""
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        
+        # 检查是否空文件
+        if not reader.fieldnames:
+            raise ValueError("Empty file")
+        
+        reader.fieldnames = _clean_fieldnames(reader.fieldnames)
+        print(f"   Columns: {len(reader.fieldnames)}")
+        
+        batch = []
+        for row in reader:
+            if not row.get('paper_id'):
+                continue
+            
+            batch.append(_row_to_doc(row))
+            if len(batch) >= MICRO_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _parse_tags_csv(csv_path: Path) -> Iterator[List[Dict[str, Any]]]:
+    """解析 tag.csv（按 paper_id 去重），按批次产出文档"""
+    seen_paper_ids = set()
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        # 显式增加 field limit 防止大字段报错
+        csv.field_size_limit(sys.maxsize)
+        
+        reader = csv.DictReader(f)
+        print(f"   Columns: {len(reader.fieldnames) if reader.fieldnames else 0}")
+        
+        batch = []
+        for row in reader:
+            paper_id = row.get('paper_id', '').strip()
+            if not paper_id:
+                continue
+            
+            if paper_id in seen_paper_ids:
+                continue
+            seen_paper_ids.add(paper_id)
+            
+            # 清理数据
+            batch.append({k: v.strip() if v else None for k, v in row.items() if k})
+            if len(batch) >= TAGS_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
 
 class BioExtractImporter:
     """BioExtract 数据导入器"""
     
     def __init__(self, mongo_uri: str, db_name: str, dry_run: bool = False):
-        self.client = AsyncIOMotorClient(mongo_uri)
+        # 宽表批量插入以带宽为瓶颈，启用线路压缩（不可用的压缩器会被驱动自动跳过）
+        self.client = AsyncIOMotorClient(
+            mongo_uri,
+            compressors="zstd,snappy,zlib",
+            zlibCompressionLevel=6,
+            maxPoolSize=50,
+        )
         self.db = self.client[db_name]
         self.dry_run = dry_run
         
@@ -60,6 +187,100 @@ class BioExtractImporter:
             "errors": 0,
         }
     
+    async def _stream_import(
+        self,
+        collection,
+        parse_batches: Callable[[Path], Iterator[List[Dict[str, Any]]]],
+        csv_path: Path,
+    ) -> Optional[int]:
+        """
+        边解析边写入
+
+        解析在工作线程中执行（避免阻塞事件循环），解析出的批次通过有界
+        asyncio.Queue 交给协程写入 MongoDB，使 CSV 解析与插入相互重叠。
+        数据先写入临时集合，全部成功后才替换目标集合（沿用目标集合的索引）；
+        中途解析或写入失败时目标集合保持不变。
+
+        Returns:
+            导入的记录数；解析失败时返回 None
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_MAXSIZE)
+
+        def produce():
+            # 在工作线程中运行：put 通过事件循环调度，队列满时阻塞以形成背压
+            try:
+                for batch in parse_batches(csv_path):
+                    asyncio.run_coroutine_threadsafe(queue.put(batch), loop).result()
+            except Exception as e:
+                asyncio.run_coroutine_threadsafe(queue.put(e), loop).result()
+                return
+            asyncio.run_coroutine_threadsafe(queue.put(None), loop).result()
+
+        staging = None
+        if not self.dry_run:
+            staging = self.db[f"{collection.name}__staging"]
+            await staging.drop()
+
+        producer = asyncio.create_task(asyncio.to_thread(produce))
+        total = 0
+        parse_error = None
+        completed = False
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    parse_error = item
+                    break
+                if staging is not None:
+                    await staging.insert_many(item)
+                    print(f"   Inserted batch: {total + len(item)}")
+                total += len(item)
+            completed = parse_error is None
+        finally:
+            if not producer.done():
+                # 继续消费，避免生产者线程阻塞在已满的队列上
+                while not producer.done():
+                    try:
+                        await asyncio.wait_for(queue.get(), timeout=0.1)
+                    except asyncio.TimeoutError:
+                        pass
+            await producer
+            if staging is not None and not completed:
+                await staging.drop()
+
+        if parse_error is not None:
+            print(f"   ❌ Error parsing CSV: {parse_error}")
+            return None
+
+        print(f"   Parsed: {total} records")
+        if self.dry_run:
+            print(f"   🔍 Dry run - skipping insert")
+            return total
+
+        await self._replace_collection(collection, staging)
+        return total
+
+    async def _replace_collection(self, collection, staging) -> None:
+        """将目标集合的索引建到临时集合上，再用 renameCollection 原子替换目标集合"""
+        try:
+            async for index in collection.list_indexes():
+                if index["name"] == "_id_":
+                    continue
+                options = {k: v for k, v in index.items() if k not in ("v", "ns", "key")}
+                keys = list(index["key"].items())
+                if "_fts" in index["key"]:
+                    # 文本索引的 key 是内部形式，需按 weights 还原字段
+                    keys = [(k, v) for k, v in keys if k not in ("_fts", "_ftsx")]
+                    keys += [(field, "text") for field in index["weights"]]
+                await staging.create_index(keys, **options)
+            await staging.rename(collection.name, dropTarget=True)
+        except Exception:
+            await staging.drop()
+            raise
+
     async def import_delivery_qwen(self, csv_path: Path) -> int:
         """
         导入递送系统数据 (delivery-qwen.csv)
@@ -73,74 +294,18 @@ class BioExtractImporter:
             print(f"   ❌ File not found!")
             return 0
         
-        # 读取并解析 CSV
-        documents = []
         try:
-            with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
-                reader = csv.DictReader(f)
-                
-                # 检查是否空文件
-                if not reader.fieldnames:
-                    print(f"   ❌ Empty file!")
-                    return 0
-                
-                # 修复 Header: 去除 " (中文说明)"
-                # "paper_id (论文ID)" -> "paper_id"
-                original_fields = reader.fieldnames
-                cleaned_fields = [f.split(' (')[0].strip() for f in original_fields]
-                reader.fieldnames = cleaned_fields
-                    
-                print(f"   Columns: {len(reader.fieldnames)}")
-                
-                for row in reader:
-                    # 过滤空行或无效行
-                    if not any(row.values()):
-                        continue
-                    
-                    if not row.get('paper_id'):
-                        continue
-
-                    # 构建文档
-                    doc = {}
-                    for key, value in row.items():
-                        if not key: continue
-                        
-                        val = value.strip() if value else None
-                        
-                        # 数值字段转换
-                        if key == 'system_index':
-                            doc[key] = int(val) if val and val.isdigit() else 0
-                        elif key.endswith('_tokens'):
-                            doc[key] = int(val) if val and val.isdigit() else 0
-                        else:
-                            doc[key] = val
-                    
-                    documents.append(doc)
-
-        except Exception as e:
-            print(f"   ❌ Error parsing CSV: {e}")
-            return 0
-        
-        print(f"   Parsed: {len(documents)} records")
-        
-        if self.dry_run:
-            print(f"   🔍 Dry run - skipping insert")
-            return len(documents)
-        
-        # 清空旧数据并批量插入
-        try:
-            await self.delivery_collection.delete_many({})
+            count = await self._stream_import(
+                self.delivery_collection, _parse_delivery_csv, csv_path
+            )
+            if count is None:
+                return 0
+            if self.dry_run:
+                return count
             
-            if documents:
-                batch_size = 1000
-                for i in range(0, len(documents), batch_size):
-                    batch = documents[i:i + batch_size]
-                    await self.delivery_collection.insert_many(batch)
-                    print(f"   Inserted batch: {i + len(batch)}/{len(documents)}")
-            
-            self.stats["delivery_imported"] = len(documents)
-            print(f"   ✅ Imported {len(documents)} delivery systems")
-            return len(documents)
+            self.stats["delivery_imported"] = count
+            print(f"   ✅ Imported {count} delivery systems")
+            return count
         except Exception as e:
             print(f"   ❌ MongoDB Error: {e}")
             self.stats["errors"] += 1
@@ -159,63 +324,18 @@ class BioExtractImporter:
             print(f"   ❌ File not found!")
             return 0
         
-        documents = []
-        try:
-            with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
-                reader = csv.DictReader(f)
-                
-                # 检查是否空文件
-                if not reader.fieldnames:
-                    print(f"   ❌ Empty file!")
-                    return 0
-                
-                # 修复 Header: "system_index (系统序号)" -> "system_index"
-                original_fields = reader.fieldnames
-                cleaned_fields = [f.split(' (')[0].strip() for f in original_fields]
-                reader.fieldnames = cleaned_fields
-                
-                print(f"   Columns: {len(reader.fieldnames)}")
-                
-                for row in reader:
-                    if not row.get('paper_id'):
-                        continue
-                        
-                    doc = {}
-                    for key, value in row.items():
-                        if not key: continue
-                        val = value.strip() if value else None
-                        
-                        if key == 'system_index':
-                            doc[key] = int(val) if val and val.isdigit() else 0
-                        elif key.endswith('_tokens'):
-                            doc[key] = int(val) if val and val.isdigit() else 0
-                        else:
-                            doc[key] = val
-                            
-                    documents.append(doc)
-        except Exception as e:
-            print(f"   ❌ Error parsing CSV: {e}")
-            return 0
-        
-        print(f"   Parsed: {len(documents)} records")
-        
-        if self.dry_run:
-            print(f"   🔍 Dry run - skipping insert")
-            return len(documents)
-        
         try:
-            await self.micro_collection.delete_many({})
-            
-            if documents:
-                batch_size = 1000
-                for i in range(0, len(documents), batch_size):
-                    batch = documents[i:i + batch_size]
-                    await self.micro_collection.insert_many(batch)
-                    print(f"   Inserted batch: {i + len(batch)}/{len(documents)}")
+            count = await self._stream_import(
+                self.micro_collection, _parse_micro_csv, csv_path
+            )
+            if count is None:
+                return 0
+            if self.dry_run:
+                return count
             
-            self.stats["micro_imported"] = len(documents)
-            print(f"   ✅ Imported {len(documents)} micro features")
-            return len(documents)
+            self.stats["micro_imported"] = count
+            print(f"   ✅ Imported {count} micro features")
+            return count
         except Exception as e:
             print(f"   ❌ MongoDB Error: {e}")
             self.stats["errors"] += 1
@@ -236,60 +356,27 @@ class BioExtractImporter:
         file_size = csv_path.stat().st_size / (1024 * 1024)
         print(f"   File size: {file_size:.2f} MB")
         
-        documents = []
-        seen_paper_ids = set()
-        
         try:
-            with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
-                # 显式增加 field limit 防止大字段报错
-                csv.field_size_limit(sys.maxsize)
-                
-                reader = csv.DictReader(f)
-                
-                print(f"   Columns: {len(reader.fieldnames) if reader.fieldnames else 0}")
-                
-                for row in reader:
-                    paper_id = row.get('paper_id', '').strip()
-                    if not paper_id:
-                        continue
-                        
-                    if paper_id in seen_paper_ids:
-                        continue
-                    seen_paper_ids.add(paper_id)
-                    
-                    # 清理数据
-                    doc = {k: v.strip() if v else None for k, v in row.items() if k}
-                    documents.append(doc)
-                    
-        except Exception as e:
-            print(f"   ❌ Error parsing CSV: {e}")
-            return 0
-        
-        print(f"   Parsed: {len(documents)} unique records")
-        
-        if self.dry_run:
-            print(f"   🔍 Dry run - skipping insert")
-            return len(documents)
-        
-        try:
-            await self.tags_collection.delete_many({})
-            
-            if documents:
-                batch_size = 5000
-                for i in range(0, len(documents), batch_size):
-                    batch = documents[i:i + batch_size]
-                    await self.tags_collection.insert_many(batch)
-                    print(f"   Inserted batch: {i + len(batch)}/{len(documents)}")
+            count = await self._stream_import(
+                self.tags_collection, _parse_tags_csv, csv_path
+            )
+            if count is None:
+                return 0
+            if self.dry_run:
+                return count
             
+            # paper_tags 已整体替换，sync_and_aggregate.py 的增量指纹随之失效
+            await self.db[SYNC_STATE_COLLECTION].drop()
+
             # 创建索引
             await self.tags_collection.create_index("paper_id", unique=True)
             await self.tags_collection.create_index("l1")
             await self.tags_collection.create_index("l2")
             print(f"   Created indexes on paper_id, l1, l2")
             
-            self.stats["tags_imported"] = len(documents)
-            print(f"   ✅ Imported {len(documents)} paper tags")
-            return len(documents)
+            self.stats["tags_imported"] = count
+            print(f"   ✅ Imported {count} paper tags")
+            return count
         except Exception as e:
             print(f"   ❌ MongoDB Error: {e}")
             self.stats["errors"] += 1
@@ -16,11 +16,12 @@ import sys
 import base64
 import hashlib
 import asyncio
-import requests
+import httpx
 from pathlib import Path
-from typing import List, Tuple, Optional, Dict
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -42,6 +43,19 @@ MONGODB_DB_NAME = os.getenv("MONGODB_DB_NAME", "biomedical_agent")
 # Output directory for files
 BASE_DIR = Path(__file__).parent.parent
 OUTPUT_DIR = BASE_DIR / "data" / "papers"
+# Content-addressed image store shared by all papers
+IMAGE_STORE_DIR = OUTPUT_DIR / "_images"
+
+# Download retry policy: transient errors and these statuses are retried
+# with exponential backoff (1s, 2s, 4s, ... capped at DOWNLOAD_MAX_BACKOFF)
+DOWNLOAD_MAX_ATTEMPTS = 5
+DOWNLOAD_MAX_BACKOFF = 30.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Maximum concurrent connections to the Paper API host
+API_MAX_CONNECTIONS = 8
+
+# Number of documents buffered before a bulk write to MongoDB
+SAVE_BATCH_SIZE = 50
 
 
 # =============================================
@@ -64,24 +78,70 @@ class MongoConnection:
 
 mongo = MongoConnection()
 
+# Image filenames already present in IMAGE_STORE_DIR during this run
+_saved_images = set()
+
 
 # =============================================
 # API Functions
 # =============================================
 
-def download_file(paper_id: str, file_type: str) -> Tuple[bool, Optional[bytes], Optional[str]]:
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Create a shared HTTP/2 client for the Paper API.
+
+    PDF and Markdown requests for every paper are multiplexed over one
+    keep-alive connection instead of paying a TLS handshake per request.
     """
-    Download PDF or Markdown file from external API
+    return httpx.AsyncClient(
+        base_url=API_BASE_URL,
+        headers={"Authorization": AUTH_TOKEN},
+        timeout=60.0,
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=API_MAX_CONNECTIONS,
+            max_keepalive_connections=API_MAX_CONNECTIONS,
+        ),
+    )
+
+
+async def download_file(
+    client: httpx.AsyncClient, paper_id: str, file_type: str
+) -> Tuple[bool, Optional[bytes], Optional[str]]:
+    """
+    Download PDF or Markdown file from external API.
+    Transient failures (network errors, 429 and 5xx) are retried with
+    exponential backoff.
     Returns: (success, content, filename)
     """
-    url = f"{API_BASE_URL}/{paper_id}/{file_type}"
     headers = {
-        "Authorization": AUTH_TOKEN,
         "Accept": f"application/{file_type}, */*" if file_type == "pdf" else "text/markdown, text/plain, */*"
     }
     
+    for attempt in range(1, DOWNLOAD_MAX_ATTEMPTS + 1):
+        try:
+            response = await client.get(f"/{paper_id}/{file_type}", headers=headers)
+        except httpx.TransportError as e:
+            if attempt == DOWNLOAD_MAX_ATTEMPTS:
+                print(f"    Error: {e}")
+                return False, None, None
+        except Exception as e:
+            print(f"    Error: {e}")
+            return False, None, None
+        else:
+            if response.status_code not in RETRYABLE_STATUS or attempt == DOWNLOAD_MAX_ATTEMPTS:
+                return _parse_download_response(response, paper_id, file_type)
+        
+        await asyncio.sleep(min(2 ** (attempt - 1), DOWNLOAD_MAX_BACKOFF))
+    
+    return False, None, None
+
+
+def _parse_download_response(
+    response: httpx.Response, paper_id: str, file_type: str
+) -> Tuple[bool, Optional[bytes], Optional[str]]:
+    """Turn a final API response into (success, content, filename)"""
     try:
-        response = requests.get(url, headers=headers, timeout=60)
         if response.status_code == 200:
             filename = f"{paper_id}.{file_type if file_type != 'markdown' else 'md'}"
             
@@ -173,18 +233,20 @@ def extract_base64_images(md_content: str) -> List[Tuple[str, str, str, str]]:
     return images
 
 
-def save_base64_image(base64_data: str, image_format: str, output_dir: Path) -> str:
+def save_base64_image(raw_bytes: bytes, image_format: str, store_dir: Path = IMAGE_STORE_DIR) -> str:
     """
-    Save base64 image to file
+    Save decoded image bytes into the shared content-addressed image store.
+    Images reused across papers (logos, schematics) are written only once.
     Returns: filename
     """
-    hash_obj = hashlib.sha256(base64_data.encode()).hexdigest()[:16]
-    filename = f"{hash_obj}.{image_format}"
-    filepath = output_dir / filename
+    digest = hashlib.blake2b(raw_bytes, digest_size=16).hexdigest()
+    filename = f"{digest}.{image_format}"
     
-    image_data = base64.b64decode(base64_data)
-    with open(filepath, 'wb') as f:
-        f.write(image_data)
+    if filename not in _saved_images:
+        filepath = store_dir / filename
+        if not filepath.exists():
+            filepath.write_bytes(raw_bytes)
+        _saved_images.add(filename)
     
     return filename
 
@@ -193,7 +255,7 @@ def save_base64_image(base64_data: str, image_format: str, output_dir: Path) ->
 # Main Import Logic
 # =============================================
 
-async def process_paper(paper_id: str) -> Optional[Dict]:
+async def process_paper(client: httpx.AsyncClient, paper_id: str) -> Optional[Dict]:
     """
     Process a single paper: download files and extract metadata
     Returns: document metadata or None
@@ -205,14 +267,12 @@ async def process_paper(paper_id: str) -> Optional[Dict]:
     # Create output directory
     paper_dir = OUTPUT_DIR / paper_id
     paper_dir.mkdir(parents=True, exist_ok=True)
-    images_dir = paper_dir / "images"
-    images_dir.mkdir(exist_ok=True)
     
     metadata = None
     
     # Download PDF
     print(f"  Downloading PDF...", end=" ")
-    pdf_ok, pdf_content, pdf_filename = download_file(paper_id, "pdf")
+    pdf_ok, pdf_content, pdf_filename = await download_file(client, paper_id, "pdf")
     if pdf_ok:
         pdf_path = paper_dir / f"{paper_id}.pdf"
         with open(pdf_path, 'wb') as f:
@@ -224,7 +284,7 @@ async def process_paper(paper_id: str) -> Optional[Dict]:
     
     # Download Markdown
     print(f"  Downloading Markdown...", end=" ")
-    md_ok, md_content, md_filename = download_file(paper_id, "markdown")
+    md_ok, md_content, md_filename = await download_file(client, paper_id, "markdown")
     if md_ok:
         md_text = md_content.decode('utf-8', errors='ignore')
         
@@ -236,8 +296,8 @@ async def process_paper(paper_id: str) -> Optional[Dict]:
         if images:
             print(f"✓ ({len(images)} images)")
             for img_format, b64_data, full_match, alt_text in images:
-                filename = save_base64_image(b64_data, img_format, images_dir)
-                md_text = md_text.replace(full_match, f"![{alt_text}](images/{filename})", 1)
+                filename = save_base64_image(base64.b64decode(b64_data), img_format)
+                md_text = md_text.replace(full_match, f"![{alt_text}](../_images/{filename})", 1)
         else:
             print("✓")
         
@@ -255,33 +315,50 @@ async def process_paper(paper_id: str) -> Optional[Dict]:
     return metadata
 
 
-async def save_document_to_mongo(doc: Dict):
+async def save_documents_to_mongo(docs: List[Dict]):
     """
-    Save document metadata to MongoDB
+    Save a batch of document metadata to MongoDB in one bulk write
     """
-    doc["createdAt"] = datetime.now()
-    doc["updatedAt"] = datetime.now()
+    if not docs:
+        return
     
-    await mongo.db["documents"].update_one(
-        {"id": doc["id"]},
-        {"$set": doc},
-        upsert=True
-    )
+    now = datetime.now()
+    operations = []
+    for doc in docs:
+        doc["createdAt"] = doc["updatedAt"] = now
+        operations.append(UpdateOne({"id": doc["id"]}, {"$set": doc}, upsert=True))
+    
+    await mongo.db["documents"].bulk_write(operations, ordered=False)
 
 
-def read_paper_ids(csv_file: Path) -> List[str]:
-    """Read paper_id list from CSV file"""
-    paper_ids = []
+def iter_paper_ids(csv_file: Path) -> Iterator[str]:
+    """Yield paper_ids from CSV file, reading only the paper_id column"""
     try:
-        with open(csv_file, 'r', encoding='utf-8', errors='ignore') as f:
-            reader = csv.DictReader(f)
+        with open(csv_file, 'r', encoding='utf-8', errors='ignore', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header or 'paper_id' not in header:
+                print("Error reading CSV: missing paper_id column")
+                return
+            idx = header.index('paper_id')
             for row in reader:
-                paper_id = row.get('paper_id', '').strip()
+                if len(row) <= idx:
+                    continue
+                paper_id = row[idx].strip()
                 if paper_id and paper_id != 'paper_id':
-                    paper_ids.append(paper_id)
+                    yield paper_id
     except Exception as e:
         print(f"Error reading CSV: {e}")
-    return paper_ids
+
+
+async def aiter_over_thread(iterator: Iterator[str]) -> AsyncIterator[str]:
+    """Drive a blocking iterator on a worker thread, one item at a time"""
+    sentinel = object()
+    while True:
+        item = await asyncio.to_thread(next, iterator, sentinel)
+        if item is sentinel:
+            return
+        yield item
 
 
 async def main():
@@ -301,12 +378,9 @@ async def main():
         print(f"Error: CSV file not found: {csv_file}")
         sys.exit(1)
     
-    # Read paper IDs
-    paper_ids = read_paper_ids(csv_file)
-    print(f"\nFound {len(paper_ids)} papers in CSV")
-    
     # Create output directory
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    IMAGE_STORE_DIR.mkdir(parents=True, exist_ok=True)
     
     # Connect to MongoDB
     await mongo.connect()
@@ -318,33 +392,57 @@ async def main():
     
     success_count = 0
     fail_count = 0
+    pending_docs: List[Dict] = []
     
-    for i, paper_id in enumerate(paper_ids, 1):
-        print(f"\n[{i}/{len(paper_ids)}] {paper_id}")
-        
+    async def flush():
+        """Write the pending batch; papers count as saved only once it is written"""
+        nonlocal success_count, fail_count, pending_docs
+        docs, pending_docs = pending_docs, []
+        if not docs:
+            return
         try:
-            metadata = await process_paper(paper_id)
-            if metadata:
-                await save_document_to_mongo(metadata)
-                success_count += 1
-                print(f"  → Saved: {metadata.get('title', 'Unknown')[:50]}...")
-            else:
-                fail_count += 1
+            await save_documents_to_mongo(docs)
         except Exception as e:
-            print(f"  Error: {e}")
-            fail_count += 1
+            print(f"  Error saving batch of {len(docs)} documents: {e}")
+            fail_count += len(docs)
+            return
+        success_count += len(docs)
+        for doc in docs:
+            print(f"  → Saved: {doc.get('title', 'Unknown')[:50]}...")
     
-    # Summary
-    print("\n" + "=" * 60)
-    print("Import Complete!")
-    print("=" * 60)
-    print(f"Success: {success_count}/{len(paper_ids)}")
-    print(f"Failed: {fail_count}")
-    print(f"\nFiles saved to: {OUTPUT_DIR}")
-    
-    # Close MongoDB
-    await mongo.close()
-
+    try:
+        async with create_http_client() as client:
+            # Paper IDs are streamed from the CSV so processing starts immediately
+            i = 0
+            async for paper_id in aiter_over_thread(iter_paper_ids(csv_file)):
+                i += 1
+                print(f"\n[{i}] {paper_id}")
+                
+                try:
+                    metadata = await process_paper(client, paper_id)
+                except Exception as e:
+                    print(f"  Error: {e}")
+                    metadata = None
+                if not metadata:
+                    fail_count += 1
+                    continue
+                
+                pending_docs.append(metadata)
+                if len(pending_docs) >= SAVE_BATCH_SIZE:
+                    await flush()
+            
+            await flush()
+        
+        # Summary
+        print("\n" + "=" * 60)
+        print("Import Complete!")
+        print("=" * 60)
+        print(f"Success: {success_count}/{success_count + fail_count}")
+        print(f"Failed: {fail_count}")
+        print(f"\nFiles saved to: {OUTPUT_DIR}")
+    finally:
+        # Close MongoDB
+        await mongo.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -4,7 +4,7 @@ CSV 数据导入脚本 - 将递送系统文献数据导入 MongoDB
 
 使用方法:
     cd backend
-    python scripts/import_materials.py /path/to/csv_file.csv
+    python scripts/import_materials.py /path/to/csv_file.csv [--batch-size 1000] [--concurrency 8] [--fast-parse] [--no-resume]
 
 CSV 结构:
     paper_id, title, authors, journal, publish_year, features (JSON)
@@ -17,36 +17,393 @@ features JSON 结构:
     }
 """
 
+import argparse
 import asyncio
 import csv
-import json
+import re
 import sys
 import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from collections import defaultdict
+from functools import lru_cache
+from itertools import islice
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterator, List, Any, Optional, Set, Tuple
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import orjson
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from dotenv import load_dotenv
 import os
 
+# Optional: pyarrow's multithreaded C++ CSV reader (pip install pyarrow)
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = pa_csv = None
+
 # Load environment variables
 load_dotenv(Path(__file__).parent.parent / ".env")
 
 MONGO_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
 DB_NAME = os.getenv("MONGODB_DB_NAME", os.getenv("MONGODB_DB", "biomedical_agent"))
 
+# pyarrow reads the CSV in blocks of this many bytes
+CSV_BLOCK_SIZE = 8 << 20
+
+# Rows per bulk-write batch
+DEFAULT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+
+# Column layout required by --fast-parse
+FAST_PARSE_COLUMNS = ("paper_id", "title", "authors", "journal", "publish_year", "features")
+
+# Document upsert keyed by (paper_id, content_hash)
+DocumentOp = Tuple[Tuple[str, str], UpdateOne]
+# Material upsert keyed by (material_id, paper_id, applications, identity fields)
+MaterialOp = Tuple[Tuple[str, str, FrozenSet[str], Tuple[Any, ...]], UpdateOne]
+
+# Fields shared by every imported document
+DOCUMENT_CONSTANTS = MappingProxyType({
+    "type": "paper",
+    "knowledgeBaseId": "kb-materials",
+    "status": "indexed",
+})
+
+# Separator between authors, absorbing the surrounding whitespace
+AUTHOR_SEP = re.compile(r"\s*;\s*")
+
+# Duplicate key error code
+DUPLICATE_KEY = 11000
+
+
+def _unquote(field: str) -> str:
+    """Strip CSV quoting from a single field"""
+    if len(field) >= 2 and field[0] == '"' and field[-1] == '"':
+        return field[1:-1].replace('""', '"')
+    return field
+
+
+def _iter_rows_fast(csv_path: str) -> Iterator[Dict[str, str]]:
+    """
+    Split each line on the first five commas instead of running the csv module
+
+    Only valid for the fixed export layout (FAST_PARSE_COLUMNS) with one record
+    per line: features is the last column, so maxsplit keeps its commas intact.
+    Lines whose leading fields are quoted with embedded commas fall back to
+    csv.reader for that line.
+    """
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        header = [h.strip() for h in f.readline().rstrip('\r\n').split(',')]
+        if tuple(header) != FAST_PARSE_COLUMNS:
+            raise ValueError(f"--fast-parse expects columns {', '.join(FAST_PARSE_COLUMNS)}")
+        
+        for line in f:
+            line = line.rstrip('\r\n')
+            if not line:
+                continue
+            parts = line.split(',', 5)
+            if len(parts) < 6 or any(
+                p[:1] == '"' and (len(p) < 2 or p[-1] != '"') for p in parts[:5]
+            ):
+                parts = next(csv.reader([line]), [])
+                if len(parts) < 6:
+                    continue
+                yield dict(zip(FAST_PARSE_COLUMNS, parts))
+            else:
+                yield dict(zip(FAST_PARSE_COLUMNS, map(_unquote, parts)))
+
+
+def iter_csv_rows(csv_path: str, fast_parse: bool = False) -> Iterator[Dict[str, str]]:
+    """
+    Stream CSV rows as dicts of strings
+
+    Uses the line splitter when fast_parse is set, else pyarrow's native block
+    reader when installed, otherwise csv.DictReader.
+    """
+    if fast_parse:
+        yield from _iter_rows_fast(csv_path)
+        return
+    
+    if pa_csv is None:
+        with open(csv_path, 'r', encoding='utf-8-sig') as f:
+            yield from csv.DictReader(f)
+        return
+    
+    # Read the header ourselves so every column is typed as string
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        header = next(csv.reader(f), None)
+    if not header:
+        return
+    
+    reader = pa_csv.open_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(
+            column_names=header, skip_rows=1, block_size=CSV_BLOCK_SIZE
+        ),
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in header},
+            strings_can_be_null=False,
+        ),
+    )
+    for record_batch in reader:
+        yield from record_batch.to_pylist()
+
+
+@lru_cache(maxsize=100_000)
+def generate_material_id(name: str) -> str:
+    """Generate deterministic ID from material name"""
+    # Must stay in sync with KnowledgeService material ids (md5 of the name),
+    # so repeated names are served from the cache instead of a faster hash
+    return hashlib.md5(name.encode()).hexdigest()[:16]
+
+
+def generate_assembly_id(system_id: str, paper_id: str) -> str:
+    """Generate deterministic ID for assembly"""
+    return hashlib.md5(f"{system_id}_{paper_id}".encode()).hexdigest()[:16]
+
+
+def build_row_ops(
+    row: Dict[str, str], now: datetime, stats: Dict[str, int]
+) -> Optional[Tuple[List[DocumentOp], List[MaterialOp], List[Dict]]]:
+    """
+    Parse a single CSV row into pending writes, timestamped with `now`
+    and counted into `stats`
+
+    Returns:
+        (keyed document ops, keyed material ops, assembly docs),
+        or None if the row is skipped
+    """
+    get = row.get
+    paper_id = get("paper_id", "")
+    title = get("title", "")
+    authors = get("authors", "")
+    journal = get("journal", "")
+    publish_year = get("publish_year", "")
+    features_str = get("features", "{}")
+    
+    if not paper_id:
+        return None
+    
+    try:
+        features = orjson.loads(features_str) if features_str and features_str != "{}" else {}
+    except orjson.JSONDecodeError as e:
+        print(f"  [ERROR] JSON parse error for paper {paper_id}: {e}")
+        stats["errors"] += 1
+        return None
+    
+    # 1. Insert/Update document record
+    # Hash of the row content; unchanged rows are skipped by the filter below
+    content_hash = hashlib.blake2b(
+        "\x1f".join((title, authors, journal, publish_year, features_str)).encode(),
+        digest_size=16
+    ).hexdigest()
+    doc_data = {
+        "id": paper_id,
+        "title": title,
+        "authors": AUTHOR_SEP.split(authors.strip()) if authors else [],
+        "source": journal,
+        "publishDate": f"{publish_year}-01-01" if publish_year else None,
+        "features": features,
+        "content_hash": content_hash,
+        "updatedAt": now,
+        **DOCUMENT_CONSTANTS
+    }
+    
+    # An unchanged document fails the filter, and the upsert then collides
+    # with the unique id index; _write_documents ignores those errors
+    doc_ops = [((paper_id, content_hash), UpdateOne(
+        {"id": paper_id, "content_hash": {"$ne": content_hash}},
+        {"$set": doc_data, "$setOnInsert": {"createdAt": now}},
+        upsert=True
+    ))]
+    
+    # 2. Process materials
+    assemblies = features.get("assemblies", [])
+    
+    # Index applications by material name once per row
+    apps_by_material: Dict[str, Set[str]] = defaultdict(set)
+    for asm in assemblies:
+        material_name = asm.get("composition", {}).get("material_name")
+        system_category = asm.get("system_category")
+        if material_name and system_category:
+            apps_by_material[material_name].add(system_category)
+    
+    mat_ops = []
+    materials = features.get("materials", [])
+    for mat in materials:
+        mat_op = process_material(mat, paper_id, apps_by_material, now)
+        if mat_op:
+            mat_ops.append(mat_op)
+    
+    # 3. Process assemblies
+    asm_docs = []
+    for asm in assemblies:
+        asm_doc = process_assembly(asm, paper_id, now)
+        if asm_doc:
+            asm_docs.append(asm_doc)
+    
+    stats["papers_processed"] += 1
+    stats["assemblies_created"] += len(asm_docs)
+    return doc_ops, mat_ops, asm_docs
+
+
+def process_material(
+    mat_data: Dict, 
+    paper_id: str, 
+    apps_by_material: Dict[str, Set[str]],
+    now: datetime
+) -> Optional[MaterialOp]:
+    """
+    Build an atomic upsert for a material record, keyed for the importer's cache
+
+    The paper and its applications are unioned into the stored arrays and
+    paper_count is recomputed server-side, so no prior read is needed and
+    concurrent batches touching the same material cannot lose updates.
+    """
+    name = mat_data.get("standardized_name", "")
+    if not name:
+        return None
+    
+    identity = mat_data.get("identity", {})
+    material_id = generate_material_id(name)
+    
+    # Applications of the assemblies that use this material
+    applications = frozenset(apps_by_material.get(name, ()))
+    # Per-row identity fields; each upsert overwrites them, so the importer's
+    # cache must not skip a row that changes them
+    category = identity.get("material_type", "unknown")
+    subcategory = identity.get("architecture")
+    abbreviation = identity.get("abbreviation")
+    functional_role = identity.get("functional_role")
+    identity_key = (category, subcategory, abbreviation, functional_role)
+    
+    # Pipeline-form update (MongoDB 4.2+); values are wrapped in $literal so
+    # strings starting with "$" are not read as field paths
+    return (material_id, paper_id, applications, identity_key), UpdateOne(
+        {"id": material_id},
+        [
+            {"$set": {
+                "name": {"$literal": name},
+                "category": {"$literal": category},
+                "subcategory": {"$literal": subcategory},
+                "abbreviation": {"$literal": abbreviation},
+                "functional_role": {"$literal": functional_role},
+                "properties": {"$literal": []},
+                "source_doc_ids": {"$setUnion": [
+                    {"$ifNull": ["$source_doc_ids", []]},
+                    {"$literal": [paper_id]},
+                ]},
+                "applications": {"$setUnion": [
+                    {"$ifNull": ["$applications", []]},
+                    {"$literal": list(applications)},
+                ]},
+                "createdAt": {"$ifNull": ["$createdAt", now]},
+                "updatedAt": now,
+            }},
+            {"$set": {"paper_count": {"$size": "$source_doc_ids"}}},
+        ],
+        upsert=True
+    )
+
+
+def process_assembly(
+    asm_data: Dict, paper_id: str, now: datetime
+) -> Optional[Dict]:
+    """Build an assembly record"""
+    system_id = asm_data.get("system_id", "")
+    if not system_id:
+        return None
+    
+    assembly_id = generate_assembly_id(system_id, paper_id)
+    composition = asm_data.get("composition", {})
+    functional_perf = asm_data.get("functional_performance", {})
+    
+    assembly_doc = {
+        "id": assembly_id,
+        "system_id": system_id,
+        "system_category": asm_data.get("system_category", "unknown"),
+        "payload_name": composition.get("payload_name"),
+        "material_name": composition.get("material_name"),
+        "loading_mode": composition.get("loading_mode"),
+        "release_kinetics": functional_perf.get("release_kinetics"),
+        "functionality_notes": functional_perf.get("functionality_notes"),
+        "targeting": functional_perf.get("targeting"),
+        "stimulus_responsiveness": functional_perf.get("stimulus_responsiveness"),
+        "source_doc_id": paper_id,
+        "metadata": asm_data,
+        "createdAt": now
+    }
+    
+    return assembly_doc
+
+
+def build_batch_ops(
+    rows: List[Dict[str, str]], now: datetime
+) -> Tuple[List[DocumentOp], List[MaterialOp], List[Dict], Dict[str, int]]:
+    """
+    Parse a batch of CSV rows into writes for the three collections
+
+    Pure function without database access, run in a worker process.
+
+    Returns:
+        (keyed document ops, keyed material ops, assembly docs, stats)
+    """
+    stats = {"papers_processed": 0, "assemblies_created": 0, "errors": 0}
+    doc_ops, mat_ops, asm_docs = [], [], []
+    # Bind the per-row callables once; this loop runs for every CSV row
+    build = build_row_ops
+    add_docs, add_mats, add_asms = doc_ops.extend, mat_ops.extend, asm_docs.extend
+    for row in rows:
+        ops = build(row, now, stats)
+        if ops:
+            add_docs(ops[0])
+            add_mats(ops[1])
+            add_asms(ops[2])
+    return doc_ops, mat_ops, asm_docs, stats
+
 
 class MaterialImporter:
-    def __init__(self, mongo_uri: str, db_name: str):
-        self.client = AsyncIOMotorClient(mongo_uri)
+    def __init__(
+        self,
+        mongo_uri: str,
+        db_name: str,
+        concurrency: int = 8,
+        fast_parse: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        # Each in-flight batch writes to three collections at once, so size the
+        # pool for that and open a few sockets up front. The embedded features
+        # JSON compresses well, so wire compression is enabled too.
+        self.client = AsyncIOMotorClient(
+            mongo_uri,
+            maxPoolSize=max(32, concurrency * 3),
+            minPoolSize=8,
+            retryWrites=True,
+            w=1,
+            compressors="zstd,snappy,zlib",
+            zlibCompressionLevel=-1,
+        )
         self.db = self.client[db_name]
         self.materials_collection = self.db["materials"]
         self.documents_collection = self.db["documents"]
         self.assemblies_collection = self.db["assemblies"]
+        # Resume cursors of interrupted imports, keyed by CSV path and tagged
+        # with the file's size/mtime
+        self.state_collection = self.db["import_state"]
+        
+        # Rows per batch, and maximum number of batches in flight at the same time
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        # Split lines directly instead of using a CSV parser
+        self.fast_parse = fast_parse
         
         # Statistics
         self.stats = {
@@ -54,196 +411,264 @@ class MaterialImporter:
             "materials_created": 0,
             "materials_updated": 0,
             "assemblies_created": 0,
+            "documents_unchanged": 0,
             "errors": 0
         }
-
-    def generate_material_id(self, name: str) -> str:
-        """Generate deterministic ID from material name"""
-        return hashlib.md5(name.encode()).hexdigest()[:16]
-
-    def generate_assembly_id(self, system_id: str, paper_id: str) -> str:
-        """Generate deterministic ID for assembly"""
-        return hashlib.md5(f"{system_id}_{paper_id}".encode()).hexdigest()[:16]
-
-    async def parse_and_import_row(self, row: Dict[str, str]) -> None:
-        """Parse a single CSV row and import data"""
-        paper_id = row.get("paper_id", "")
-        title = row.get("title", "")
-        authors = row.get("authors", "")
-        journal = row.get("journal", "")
-        publish_year = row.get("publish_year", "")
-        features_str = row.get("features", "{}")
-        
-        if not paper_id:
-            return
-        
-        try:
-            features = json.loads(features_str) if features_str else {}
-        except json.JSONDecodeError as e:
-            print(f"  [ERROR] JSON parse error for paper {paper_id}: {e}")
-            self.stats["errors"] += 1
-            return
-        
-        # 1. Insert/Update document record
-        doc_data = {
-            "id": paper_id,
-            "title": title,
-            "authors": [a.strip() for a in authors.split(";")] if authors else [],
-            "source": journal,
-            "publishDate": f"{publish_year}-01-01" if publish_year else None,
-            "type": "paper",
-            "knowledgeBaseId": "kb-materials",
-            "status": "indexed",
-            "features": features,
-            "updatedAt": datetime.now()
-        }
-        
-        await self.documents_collection.update_one(
-            {"id": paper_id},
-            {"$set": doc_data, "$setOnInsert": {"createdAt": datetime.now()}},
-            upsert=True
-        )
         
-        # 2. Process materials
-        materials = features.get("materials", [])
-        for mat in materials:
-            await self.process_material(mat, paper_id, features.get("assemblies", []))
-        
-        # 3. Process assemblies
-        assemblies = features.get("assemblies", [])
-        for asm in assemblies:
-            await self.process_assembly(asm, paper_id)
-        
-        self.stats["papers_processed"] += 1
+        # (paper_id, content_hash) pairs already written during this run
+        self._seen_documents: Set[Tuple[str, str]] = set()
+        # material_id -> [paper ids, applications, identity fields] already
+        # written during this run
+        self._material_cache: Dict[str, List[Any]] = {}
 
-    async def process_material(
-        self, 
-        mat_data: Dict, 
-        paper_id: str, 
-        assemblies: List[Dict]
+    async def _import_batch(
+        self, pool: ProcessPoolExecutor, rows: List[Dict[str, str]]
     ) -> None:
-        """Process and upsert a material record"""
-        name = mat_data.get("standardized_name", "")
-        if not name:
-            return
-        
-        identity = mat_data.get("identity", {})
-        material_id = self.generate_material_id(name)
-        
-        # Extract applications from assemblies that use this material
-        applications = set()
-        for asm in assemblies:
-            composition = asm.get("composition", {})
-            if composition.get("material_name") == name:
-                system_category = asm.get("system_category")
-                if system_category:
-                    applications.add(system_category)
+        """Parse a batch of rows in the process pool, then write it"""
+        loop = asyncio.get_running_loop()
+        doc_ops, mat_ops, asm_docs, batch_stats = await loop.run_in_executor(
+            pool, build_batch_ops, rows, datetime.now()
+        )
+        for key, value in batch_stats.items():
+            self.stats[key] += value
         
-        # Prepare material document
-        material_doc = {
-            "id": material_id,
-            "name": name,
-            "category": identity.get("material_type", "unknown"),
-            "subcategory": identity.get("architecture"),
-            "abbreviation": identity.get("abbreviation"),
-            "functional_role": identity.get("functional_role"),
-            "properties": [],
-            "applications": list(applications),
-            "source_doc_ids": [paper_id],
-            "updatedAt": datetime.now()
-        }
+        # Skip documents already written with the same content in this run
+        new_doc_ops = []
+        for key, op in doc_ops:
+            if key in self._seen_documents:
+                self.stats["documents_unchanged"] += 1
+            else:
+                self._seen_documents.add(key)
+                new_doc_ops.append(op)
         
-        # Check if exists
-        existing = await self.materials_collection.find_one({"id": material_id})
+        # Skip material upserts that would not add a paper or application nor
+        # change the identity fields written last
+        new_mat_ops = []
+        for (material_id, paper_id, applications, identity), op in mat_ops:
+            cached = self._material_cache.get(material_id)
+            if cached is None:
+                cached = self._material_cache[material_id] = [set(), set(), identity]
+            elif paper_id in cached[0] and applications <= cached[1] and identity == cached[2]:
+                continue
+            cached[0].add(paper_id)
+            cached[1].update(applications)
+            cached[2] = identity
+            new_mat_ops.append(op)
         
+        await self._flush_batch(new_doc_ops, new_mat_ops, asm_docs)
+
+    async def _write_documents(self, doc_ops: List[UpdateOne]) -> None:
+        """Upsert documents, treating content_hash filter misses as unchanged"""
+        try:
+            await self.documents_collection.bulk_write(doc_ops, ordered=False)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            if any(err.get("code") != DUPLICATE_KEY for err in write_errors):
+                raise
+            self.stats["documents_unchanged"] += len(write_errors)
+
+    async def _write_assemblies(self, asm_docs: List[Dict]) -> None:
+        """
+        Write assemblies, inserting directly when none of their papers were
+        imported before and falling back to upserts on re-imports
+        """
+        paper_ids = list({doc["source_doc_id"] for doc in asm_docs})
+        existing = await self.assemblies_collection.count_documents(
+            {"source_doc_id": {"$in": paper_ids}}, limit=1
+        )
         if existing:
-            # Merge data
-            existing_doc_ids = set(existing.get("source_doc_ids", []))
-            existing_doc_ids.add(paper_id)
-            material_doc["source_doc_ids"] = list(existing_doc_ids)
-            material_doc["paper_count"] = len(material_doc["source_doc_ids"])
-            
-            existing_apps = set(existing.get("applications", []))
-            existing_apps.update(applications)
-            material_doc["applications"] = list(existing_apps)
-            
-            material_doc["createdAt"] = existing.get("createdAt", datetime.now())
-            
-            await self.materials_collection.update_one(
-                {"id": material_id},
-                {"$set": material_doc}
+            await self.assemblies_collection.bulk_write(
+                [UpdateOne({"id": doc["id"]}, {"$set": doc}, upsert=True) for doc in asm_docs],
+                ordered=False
             )
-            self.stats["materials_updated"] += 1
-        else:
-            material_doc["createdAt"] = datetime.now()
-            material_doc["paper_count"] = 1
-            await self.materials_collection.insert_one(material_doc)
-            self.stats["materials_created"] += 1
-
-    async def process_assembly(self, asm_data: Dict, paper_id: str) -> None:
-        """Process and insert an assembly record"""
-        system_id = asm_data.get("system_id", "")
-        if not system_id:
             return
         
-        assembly_id = self.generate_assembly_id(system_id, paper_id)
-        composition = asm_data.get("composition", {})
-        functional_perf = asm_data.get("functional_performance", {})
-        
-        assembly_doc = {
-            "id": assembly_id,
-            "system_id": system_id,
-            "system_category": asm_data.get("system_category", "unknown"),
-            "payload_name": composition.get("payload_name"),
-            "material_name": composition.get("material_name"),
-            "loading_mode": composition.get("loading_mode"),
-            "release_kinetics": functional_perf.get("release_kinetics"),
-            "functionality_notes": functional_perf.get("functionality_notes"),
-            "targeting": functional_perf.get("targeting"),
-            "stimulus_responsiveness": functional_perf.get("stimulus_responsiveness"),
-            "source_doc_id": paper_id,
-            "metadata": asm_data,
-            "createdAt": datetime.now()
-        }
+        try:
+            await self.assemblies_collection.insert_many(asm_docs, ordered=False)
+        except BulkWriteError as e:
+            # Another batch may have inserted the same assembly meanwhile
+            if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+                raise
+
+    async def _flush_batch(
+        self,
+        doc_ops: List[UpdateOne],
+        mat_ops: List[UpdateOne],
+        asm_docs: List[Dict],
+    ) -> None:
+        """Write one batch to the three collections with unordered bulk writes"""
+        writes = []
+        if doc_ops:
+            writes.append(self._write_documents(doc_ops))
+        if asm_docs:
+            writes.append(self._write_assemblies(asm_docs))
+        if mat_ops:
+            writes.append(self.materials_collection.bulk_write(mat_ops, ordered=False))
+        if not writes:
+            return
         
-        # Upsert assembly
-        await self.assemblies_collection.update_one(
-            {"id": assembly_id},
-            {"$set": assembly_doc},
+        results = await asyncio.gather(*writes)
+        if mat_ops:
+            mat_result = results[-1]
+            self.stats["materials_created"] += mat_result.upserted_count
+            self.stats["materials_updated"] += mat_result.matched_count
+
+    async def ensure_indexes(self) -> None:
+        """
+        Create unique indexes on the `id` fields every upsert matches on, and
+        on assemblies.source_doc_id for the re-import check
+
+        documents is shared with init_database/rebuild_database, whose records
+        have no `id`; its index is partial so those don't all collide on null.
+        An existing unique `id` index (e.g. from sync_and_aggregate) is kept.
+        """
+        info = await self.documents_collection.index_information()
+        if not any(spec["key"] == [("id", 1)] and spec.get("unique") for spec in info.values()):
+            await self.documents_collection.create_index(
+                "id", unique=True, partialFilterExpression={"id": {"$exists": True}}
+            )
+        await self.materials_collection.create_index("id", unique=True)
+        await self.assemblies_collection.create_index("id", unique=True)
+        await self.assemblies_collection.create_index("source_doc_id")
+
+    async def _load_cursor(self, state_id: str, fingerprint: str) -> int:
+        """
+        Return the number of CSV rows already imported by an interrupted run
+
+        A cursor saved for a different version of the file (size/mtime changed)
+        is discarded, since its row count no longer refers to the same rows.
+        """
+        state = await self.state_collection.find_one({"_id": state_id})
+        if not state:
+            return 0
+        if state.get("fingerprint") != fingerprint:
+            print(f"File changed since the interrupted run, ignoring its cursor (row {state.get('rows', 0)})")
+            await self.state_collection.delete_one({"_id": state_id})
+            return 0
+        return state.get("rows", 0)
+
+    async def _save_cursor(self, state_id: str, fingerprint: str, rows: int) -> None:
+        """Persist the imported row count; $max keeps it monotonic across writers"""
+        await self.state_collection.update_one(
+            {"_id": state_id},
+            {
+                "$max": {"rows": rows},
+                "$set": {"fingerprint": fingerprint, "updatedAt": datetime.now()},
+            },
             upsert=True
         )
-        self.stats["assemblies_created"] += 1
 
-    async def import_csv(self, csv_path: str) -> Dict[str, int]:
-        """Import all data from CSV file"""
+    async def import_csv(self, csv_path: str, resume: bool = True) -> Dict[str, int]:
+        """
+        Import all data from CSV file
+
+        Progress is checkpointed after every batch; with `resume`, rows already
+        imported by an interrupted run of the same file are skipped.
+        """
         print(f"Starting import from: {csv_path}")
         print(f"MongoDB: {MONGO_URI} / {DB_NAME}")
+        print(f"Batch size: {self.batch_size}, concurrency: {self.concurrency}")
         print("-" * 60)
         
-        with open(csv_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            
-            batch_size = 100
-            batch = []
+        await self.ensure_indexes()
+        
+        if not self.fast_parse and pa_csv is None:
+            print("pyarrow not installed, using csv module. Run: pip install pyarrow")
+        
+        state_id = str(Path(csv_path).resolve())
+        stat = os.stat(csv_path)
+        fingerprint = f"{stat.st_size}:{stat.st_mtime_ns}"
+        if resume:
+            start_row = await self._load_cursor(state_id, fingerprint)
+        else:
+            # Drop any old cursor so $max in _save_cursor starts from this run
+            await self.state_collection.delete_one({"_id": state_id})
+            start_row = 0
+        if start_row:
+            print(f"Resuming: skipping the first {start_row} rows imported by an interrupted run "
+                  f"(use --no-resume to import them again)")
+        
+        # Batches finish out of order; the cursor only advances over the
+        # contiguous prefix of completed batches
+        finished: Dict[int, int] = {}
+        next_seq = 0
+        
+        async def checkpoint(seq: int, end_row: int):
+            nonlocal next_seq
+            finished[seq] = end_row
+            cursor = None
+            while next_seq in finished:
+                cursor = finished.pop(next_seq)
+                next_seq += 1
+            if cursor is not None:
+                await self._save_cursor(state_id, fingerprint, cursor)
+        
+        loop = asyncio.get_running_loop()
+        # Batches read but not yet picked up by a consumer
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        failures: List[BaseException] = []
+        
+        def read_batches():
+            # Runs in a worker thread; put blocks while the queue is full
+            def put(item):
+                asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
             
-            for i, row in enumerate(reader):
-                batch.append(row)
-                
-                if len(batch) >= batch_size:
-                    for r in batch:
-                        await self.parse_and_import_row(r)
-                    batch = []
+            try:
+                seq = 0
+                rows: List[Dict[str, str]] = []
+                all_rows = iter_csv_rows(csv_path, self.fast_parse)
+                for i, row in enumerate(islice(all_rows, start_row, None), start_row):
+                    if failures:
+                        break
+                    rows.append(row)
+                    if len(rows) >= self.batch_size:
+                        put((seq, i + 1, rows))
+                        seq += 1
+                        rows = []
                     
                     if (i + 1) % 1000 == 0:
                         print(f"  Processed {i + 1} rows...")
-            
-            # Process remaining
-            for r in batch:
-                await self.parse_and_import_row(r)
+                
+                # Process remaining
+                if rows and not failures:
+                    put((seq, i + 1, rows))
+            finally:
+                for _ in range(self.concurrency):
+                    put(None)
+        
+        async def consume(pool: ProcessPoolExecutor):
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                # After a failure keep draining so the reader never blocks
+                if failures:
+                    continue
+                seq, end_row, rows = item
+                try:
+                    await self._import_batch(pool, rows)
+                    await checkpoint(seq, end_row)
+                except Exception as e:
+                    failures.append(e)
+        
+        # CSV reading, row parsing (worker processes) and bulk writes all
+        # overlap; `concurrency` consumers bound the batches in flight
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+            consumers = [
+                asyncio.create_task(consume(pool)) for _ in range(self.concurrency)
+            ]
+            await asyncio.gather(asyncio.to_thread(read_batches), *consumers)
+        
+        if failures:
+            raise failures[0]
+        
+        # Finished: the next run of this file starts from the beginning again
+        await self.state_collection.delete_one({"_id": state_id})
         
         print("-" * 60)
         print("Import completed!")
         print(f"Papers processed:   {self.stats['papers_processed']}")
+        print(f"Papers unchanged:   {self.stats['documents_unchanged']}")
         print(f"Materials created:  {self.stats['materials_created']}")
         print(f"Materials updated:  {self.stats['materials_updated']}")
         print(f"Assemblies created: {self.stats['assemblies_created']}")
@@ -256,21 +681,49 @@ class MaterialImporter:
 
 
 async def main():
-    if len(sys.argv) < 2:
-        print("Usage: python import_materials.py <csv_file_path>")
-        print("Example: python import_materials.py ../递送系统提取_export.csv")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Import delivery system materials from CSV to MongoDB")
+    parser.add_argument("csv_path", help="CSV file, e.g. ../递送系统提取_export.csv")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Maximum number of batches written concurrently (default: 8)"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Rows per bulk-write batch (default: $IMPORT_BATCH_SIZE or 1000)"
+    )
+    parser.add_argument(
+        "--fast-parse",
+        action="store_true",
+        help="Split lines on commas instead of using a CSV parser; "
+             "requires the standard export columns and one record per line"
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Ignore the saved cursor of an interrupted import and start over"
+    )
+    args = parser.parse_args()
     
-    csv_path = sys.argv[1]
+    csv_path = args.csv_path
     
     if not Path(csv_path).exists():
         print(f"Error: File not found: {csv_path}")
         sys.exit(1)
     
-    importer = MaterialImporter(MONGO_URI, DB_NAME)
+    importer = MaterialImporter(
+        MONGO_URI,
+        DB_NAME,
+        concurrency=args.concurrency,
+        fast_parse=args.fast_parse,
+        batch_size=args.batch_size,
+    )
     
     try:
-        await importer.import_csv(csv_path)
+        await importer.import_csv(csv_path, resume=not args.no_resume)
     finally:
         await importer.close()
 
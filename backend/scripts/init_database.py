@@ -6,7 +6,7 @@ Bio-Agent 数据库初始化脚本
 
 使用方法:
     cd backend
-    python scripts/init_database.py [--dry-run] [--skip-md-check]
+    python scripts/init_database.py [--dry-run] [--skip-md-check] [--fast-parse]
 
 数据源:
     - 递送系统提取_export_2026-01-27 (1).csv → biomaterials collection (category: delivery_system)
@@ -15,21 +15,36 @@ Bio-Agent 数据库初始化脚本
 """
 
 import csv
-import json
+import hashlib
+import mmap
 import asyncio
 import sys
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Any
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Any, NamedTuple, Optional, Tuple
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import orjson
+from passlib.context import CryptContext
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError
+from pymongo.write_concern import WriteConcern
 from dotenv import load_dotenv
 import os
 
+# 可选：pyarrow 的多线程 C++ CSV 解析器 (pip install pyarrow)
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = pa_csv = None
+
 # Load environment variables
 load_dotenv(Path(__file__).parent.parent / ".env")
 
@@ -44,17 +59,259 @@ PROJECT_ROOT = Path(__file__).parent.parent.parent
 DELIVERY_CSV = PROJECT_ROOT / "递送系统提取_export_2026-01-27 (1).csv"
 MICROBE_CSV = PROJECT_ROOT / "微生物提取_export_2026-01-29 (1).csv"
 
+# 增加 csv 字段大小限制，防止大 JSON 字段报错；
+# sys.maxsize 在 Windows / 32 位构建上会触发 OverflowError，逐步缩小直到被接受
+_field_size_limit = sys.maxsize
+while True:
+    try:
+        csv.field_size_limit(_field_size_limit)
+        break
+    except OverflowError:
+        _field_size_limit //= 10
+
+# 密码哈希上下文（模块级只构建一次）；显式固定 passlib 的默认 bcrypt 参数，
+# 与 AuthService 生成的哈希保持一致
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=12, bcrypt__ident="2b"
+)
+
+# CSV 列顺序；pyarrow 每次读取的块大小；csv 模块回退路径的文件读缓冲
+CSV_COLUMNS = ("paper_id", "title", "authors", "journal", "publish_year", "features")
+CSV_BLOCK_SIZE = 8 << 20
+CSV_READ_BUFFER = 1 << 20
+# --fast-parse 时每个 CSV 按换行切分的字节区间数（每段由一个进程解析）
+PARSE_CHUNKS = os.cpu_count() or 1
+
+# MongoDB 重复键错误码
+DUPLICATE_KEY = 11000
+
+# biomaterials.raw_data 只保留材料检索（KnowledgeService.get_materials）用到的字段，
+# 其余内容已拆分到 functional_performance / biological_impact 等字段
+RAW_DATA_FIELDS = (
+    ("identity", "genus"),
+    ("identity", "species"),
+    ("chassis_and_growth", "growth_conditions", "oxygen_notes"),
+    ("effector_modules", "output_control", "mechanism_of_action"),
+)
+
+# 写入批大小（驱动会按 maxWriteBatchSize / 48MB 消息上限自动拆分）；
+# 等待写入的批次上限（构建下一批与上一批写入重叠）
+WRITE_BATCH_SIZE = 10_000
+WRITE_QUEUE_MAXSIZE = 8
+# 每个集合同时在途的 bulk_write 数量
+WRITE_CONCURRENCY = 8
+# 批量导入只等待主节点确认、不等待 journal（副本集 5.0+ 默认是 majority）；
+# 导入可整体重跑，仍保留确认以便统计未变化文档并暴露写入错误。索引与管理员写入沿用默认
+BULK_WRITE_CONCERN = WriteConcern(w=1, j=False)
+
+# 各集合索引定义: collection -> [(keys, create_index 参数)]
+INDEX_SPECS: Dict[str, List[Tuple[Any, Dict[str, Any]]]] = {
+    # =============================================
+    # 核心业务数据表
+    # =============================================
+
+    # documents collection - 论文文献
+    "documents": [
+        ("paper_id", {"unique": True}),
+        ("source_tables", {}),
+        ([("title", "text"), ("authors", "text")], {}),
+    ],
+
+    # biomaterials collection - 生物材料
+    "biomaterials": [
+        ("name", {"unique": True}),
+        ("category", {}),
+        ("subcategory", {}),
+        ("paper_ids", {}),
+        ([("name", "text"), ("paper_titles", "text")], {}),
+    ],
+
+    # paper_tags collection - 论文标签
+    "paper_tags": [
+        ("paper_id", {"unique": True}),
+        ("l1", {}),
+        ("l2", {}),
+        ("classification", {}),
+    ],
+
+    # atps_records collection - ATPS 记录
+    "atps_records": [
+        ("polymer1", {}),
+        ("polymer2", {}),
+        ([("polymer1", 1), ("polymer2", 1)], {}),
+    ],
+
+    # assemblies collection - 组装体
+    "assemblies": [
+        ("system_id", {"unique": True}),
+        ("category", {}),
+        ("paper_id", {}),
+    ],
+
+    # =============================================
+    # 用户与认证
+    # =============================================
+
+    # users collection - 用户
+    "users": [
+        ("username", {"unique": True}),
+        ("email", {"unique": True}),
+        ("role", {}),
+        ("is_active", {}),
+    ],
+
+    # =============================================
+    # 对话管理
+    # =============================================
+
+    # conversations collection - 对话
+    "conversations": [
+        ("id", {"unique": True}),
+        ("user_id", {}),
+        ("created_at", {}),
+        ("updated_at", {}),
+        ([("user_id", 1), ("created_at", -1)], {}),
+        ([("user_id", 1), ("updated_at", -1)], {}),
+    ],
+
+    # messages collection - 消息
+    "messages": [
+        ("id", {"unique": True}),
+        ("conversation_id", {}),
+        ("timestamp", {}),
+        ([("conversation_id", 1), ("timestamp", 1)], {}),
+    ],
+
+    # =============================================
+    # Agent 与 LLM 配置
+    # =============================================
+
+    # agents collection - Agent 配置
+    "agents": [
+        ("id", {"unique": True}),
+        ("name", {}),
+        ("is_active", {}),
+        ("created_at", {}),
+    ],
+
+    # llm_providers collection - LLM 提供商
+    "llm_providers": [
+        ("id", {"unique": True}),
+        ("name", {}),
+        ("provider_type", {}),
+        ("is_active", {}),
+    ],
+
+    # prompts collection - 提示词模板
+    "prompts": [
+        ("id", {"unique": True}),
+        ("name", {}),
+        ("category", {}),
+        ("is_active", {}),
+    ],
+
+    # =============================================
+    # MCP 配置
+    # =============================================
+
+    # mcp_configs collection - MCP 全局配置
+    "mcp_configs": [
+        ("id", {"unique": True}),
+        ("name", {}),
+    ],
+
+    # mcp_servers collection - MCP 服务器
+    "mcp_servers": [
+        ("id", {"unique": True}),
+        ("name", {}),
+        ("is_active", {}),
+    ],
+
+    # mcp_tools collection - MCP 工具
+    "mcp_tools": [
+        ("id", {"unique": True}),
+        ("server_id", {}),
+        ("name", {}),
+        ("is_enabled", {}),
+    ],
+
+    # =============================================
+    # 知识库与技能
+    # =============================================
+
+    # knowledge_bases collection - 知识库
+    "knowledge_bases": [
+        ("id", {"unique": True}),
+        ("name", {}),
+        ("category", {}),
+        ("created_at", {}),
+    ],
+
+    # skills collection - 技能
+    "skills": [
+        ("id", {"unique": True}),
+        ("name", {}),
+        ("category", {}),
+        ("is_active", {}),
+    ],
+
+    # =============================================
+    # 文件与任务
+    # =============================================
+
+    # files collection - 文件存储
+    "files": [
+        ("id", {"unique": True}),
+        ("filename", {}),
+        ("user_id", {}),
+        ("created_at", {}),
+    ],
+
+    # ocr_tasks collection - OCR 任务
+    "ocr_tasks": [
+        ("id", {"unique": True}),
+        ("file_id", {}),
+        ("status", {}),
+        ("created_at", {}),
+    ],
+
+    # playground_sessions collection - Playground 会话
+    "playground_sessions": [
+        ("id", {"unique": True}),
+        ("user_id", {}),
+        ("created_at", {}),
+    ],
+}
+
+
+class _TextParts(list):
+    """_merge_functional 累积的待拼接字符串片段"""
+
+
+class CsvRecord(NamedTuple):
+    """CSV 单行解析结果（比每行一个 dict 更省内存，字段访问也更快）"""
+    paper_id: str
+    title: str
+    authors: str
+    journal: str
+    publish_year: int
+    features: Dict[str, Any]
+
 
 class DatabaseInitializer:
     """数据库初始化器"""
     
-    def __init__(self, mongo_uri: str, db_name: str, dry_run: bool = False):
+    def __init__(self, mongo_uri: str, db_name: str, dry_run: bool = False, fast_parse: bool = False):
         self.mongo_uri = mongo_uri
         self.db_name = db_name
         self.dry_run = dry_run
+        self.fast_parse = fast_parse
         self.client = None
         self.db = None
         
+        # 本次导入的所有记录共用同一个 created_at
+        self.import_time = datetime.now()
+        
         # 统计
         self.stats = {
             "documents_total": 0,
@@ -75,275 +332,347 @@ class DatabaseInitializer:
         if self.client:
             self.client.close()
     
-    def parse_csv(self, csv_path: Path) -> List[Dict[str, Any]]:
-        """解析 CSV 文件"""
-        records = []
-        
-        # 增加字段大小限制，防止大 JSON 字段报错
-        csv.field_size_limit(sys.maxsize)
-        
-        with open(csv_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # 解析 features JSON (第6列)
-                features_str = row.get('features', '{}')
-                try:
-                    features = json.loads(features_str)
-                except json.JSONDecodeError:
-                    features = {}
+    @staticmethod
+    def _unquote(field: bytes) -> bytes:
+        """去除单个字段的 CSV 引号"""
+        if len(field) >= 2 and field[:1] == b'"' and field[-1:] == b'"':
+            return field[1:-1].replace(b'""', b'"')
+        return field
+    
+    @classmethod
+    def _iter_csv_rows_fast(
+        cls, csv_path: Path, byte_range: Optional[Tuple[int, int]] = None
+    ) -> Iterator[Tuple[Any, ...]]:
+        """
+        mmap 整个文件并按行切分，绕过 csv 模块
+        
+        仅适用于固定导出格式（列为 CSV_COLUMNS，且每条记录占一行）：features 是最后一列，
+        按前 5 个逗号切分即可保留其内部逗号；前 5 列含带逗号的引号字段时该行回退到 csv.reader。
+        features 以 bytes 产出，由 orjson 直接解码。
+        byte_range 为 _split_csv 给出的 [start, end) 区间，只解析落在其中的行。
+        """
+        with open(csv_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                header = mm.readline().decode('utf-8-sig').rstrip('\r\n').split(',')
+                if tuple(h.strip() for h in header) != CSV_COLUMNS:
+                    raise ValueError(f"--fast-parse expects columns {', '.join(CSV_COLUMNS)}")
                 
-                records.append({
-                    "paper_id": row.get("paper_id", ""),
-                    "title": row.get("title", ""),
-                    "authors": row.get("authors", ""),
-                    "journal": row.get("journal", ""),
-                    "publish_year": int(row.get("publish_year", 0)) if row.get("publish_year", "").isdigit() else 0,
-                    "features": features,
-                })
-        return records
+                end = len(mm)
+                if byte_range is not None:
+                    start, end = byte_range
+                    mm.seek(start)
+                while mm.tell() < end:
+                    raw = mm.readline().rstrip(b'\r\n')
+                    if not raw:
+                        continue
+                    parts = raw.split(b',', 5)
+                    if len(parts) < 6 or any(
+                        p[:1] == b'"' and (len(p) < 2 or p[-1:] != b'"') for p in parts[:5]
+                    ):
+                        fields = next(csv.reader([raw.decode('utf-8')]), [])
+                        if len(fields) < 6:
+                            continue
+                        yield tuple(fields[:6])
+                    else:
+                        yield (
+                            *(cls._unquote(p).decode('utf-8') for p in parts[:5]),
+                            cls._unquote(parts[5]),
+                        )
+    
+    @staticmethod
+    def _split_csv(csv_path: Path, chunks: int) -> List[Tuple[int, int]]:
+        """把表头之后的数据区切成至多 chunks 个字节区间，每个边界都对齐到行首"""
+        with open(csv_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                start = mm.find(b'\n') + 1
+                if start == 0 or start >= size:
+                    return []
+                step = max((size - start) // chunks, 1)
+                bounds = [start]
+                while True:
+                    # 从目标位置前一个字节开始找，恰好落在行首时不会跳过整行
+                    nl = mm.find(b'\n', bounds[-1] + step - 1)
+                    if nl == -1 or nl + 1 >= size:
+                        break
+                    bounds.append(nl + 1)
+                bounds.append(size)
+        return list(zip(bounds, bounds[1:]))
     
-    async def create_indexes(self):
-        """创建数据库索引（为所有集合创建必要索引）"""
-        print("\n📊 Creating indexes for all collections...")
+    @staticmethod
+    def _iter_csv_rows(csv_path: Path) -> Iterator[Tuple[str, ...]]:
+        """按 CSV_COLUMNS 顺序逐行产出字段元组（优先使用 pyarrow，未安装时回退到 csv 模块）"""
+        if pa_csv is None:
+            with open(csv_path, 'r', encoding='utf-8-sig', buffering=CSV_READ_BUFFER) as f:
+                reader = csv.reader(f)
+                header = next(reader, None)
+                if not header:
+                    return
+                
+                # 表头只解析一次，之后按列下标取值，不再为每行构造 dict
+                indices = [header.index(name) if name in header else -1 for name in CSV_COLUMNS]
+                defaults = ["{}" if name == "features" else "" for name in CSV_COLUMNS]
+                width = max(indices) + 1
+                getter = itemgetter(*indices) if min(indices) >= 0 else None
+                for row in reader:
+                    if not row:
+                        continue
+                    if getter is not None and len(row) >= width:
+                        yield getter(row)
+                    else:
+                        # 缺列或短行：缺失字段取默认值
+                        yield tuple(
+                            row[i] if 0 <= i < len(row) else default
+                            for i, default in zip(indices, defaults)
+                        )
+            return
         
-        if self.dry_run:
-            print("   Skipped (dry run)")
+        # 自行读取表头，使所有列都按字符串解析
+        with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+            header = next(csv.reader(f), None)
+        if not header:
             return
         
-        # =============================================
-        # 核心业务数据表
-        # =============================================
-        
-        # documents collection - 论文文献
-        docs = self.db["documents"]
-        await docs.create_index("paper_id", unique=True)
-        await docs.create_index("source_tables")
-        await docs.create_index([("title", "text"), ("authors", "text")])
-        print("   ✓ documents")
-        
-        # biomaterials collection - 生物材料
-        bio = self.db["biomaterials"]
-        await bio.create_index("name", unique=True)
-        await bio.create_index("category")
-        await bio.create_index("subcategory")
-        await bio.create_index("paper_ids")
-        await bio.create_index([("name", "text"), ("paper_titles", "text")])
-        print("   ✓ biomaterials")
-        
-        # paper_tags collection - 论文标签
-        tags = self.db["paper_tags"]
-        await tags.create_index("paper_id", unique=True)
-        await tags.create_index("l1")
-        await tags.create_index("l2")
-        await tags.create_index("classification")
-        print("   ✓ paper_tags")
-        
-        # atps_records collection - ATPS 记录
-        atps = self.db["atps_records"]
-        await atps.create_index("polymer1")
-        await atps.create_index("polymer2")
-        await atps.create_index([("polymer1", 1), ("polymer2", 1)])
-        print("   ✓ atps_records")
-        
-        # assemblies collection - 组装体
-        assemblies = self.db["assemblies"]
-        await assemblies.create_index("system_id", unique=True)
-        await assemblies.create_index("category")
-        await assemblies.create_index("paper_id")
-        print("   ✓ assemblies")
-        
-        # =============================================
-        # 用户与认证
-        # =============================================
-        
-        # users collection - 用户
-        users = self.db["users"]
-        await users.create_index("username", unique=True)
-        await users.create_index("email", unique=True)
-        await users.create_index("role")
-        await users.create_index("is_active")
-        print("   ✓ users")
-        
-        # =============================================
-        # 对话管理
-        # =============================================
-        
-        # conversations collection - 对话
-        convos = self.db["conversations"]
-        await convos.create_index("id", unique=True)
-        await convos.create_index("user_id")
-        await convos.create_index("created_at")
-        await convos.create_index("updated_at")
-        await convos.create_index([("user_id", 1), ("created_at", -1)])
-        await convos.create_index([("user_id", 1), ("updated_at", -1)])
-        print("   ✓ conversations")
-        
-        # messages collection - 消息
-        msgs = self.db["messages"]
-        await msgs.create_index("id", unique=True)
-        await msgs.create_index("conversation_id")
-        await msgs.create_index("timestamp")
-        await msgs.create_index([("conversation_id", 1), ("timestamp", 1)])
-        print("   ✓ messages")
-        
-        # =============================================
-        # Agent 与 LLM 配置
-        # =============================================
-        
-        # agents collection - Agent 配置
-        agents = self.db["agents"]
-        await agents.create_index("id", unique=True)
-        await agents.create_index("name")
-        await agents.create_index("is_active")
-        await agents.create_index("created_at")
-        print("   ✓ agents")
-        
-        # llm_providers collection - LLM 提供商
-        providers = self.db["llm_providers"]
-        await providers.create_index("id", unique=True)
-        await providers.create_index("name")
-        await providers.create_index("provider_type")
-        await providers.create_index("is_active")
-        print("   ✓ llm_providers")
-        
-        # prompts collection - 提示词模板
-        prompts = self.db["prompts"]
-        await prompts.create_index("id", unique=True)
-        await prompts.create_index("name")
-        await prompts.create_index("category")
-        await prompts.create_index("is_active")
-        print("   ✓ prompts")
-        
-        # =============================================
-        # MCP 配置
-        # =============================================
-        
-        # mcp_configs collection - MCP 全局配置
-        mcp_configs = self.db["mcp_configs"]
-        await mcp_configs.create_index("id", unique=True)
-        await mcp_configs.create_index("name")
-        print("   ✓ mcp_configs")
-        
-        # mcp_servers collection - MCP 服务器
-        mcp_servers = self.db["mcp_servers"]
-        await mcp_servers.create_index("id", unique=True)
-        await mcp_servers.create_index("name")
-        await mcp_servers.create_index("is_active")
-        print("   ✓ mcp_servers")
-        
-        # mcp_tools collection - MCP 工具
-        mcp_tools = self.db["mcp_tools"]
-        await mcp_tools.create_index("id", unique=True)
-        await mcp_tools.create_index("server_id")
-        await mcp_tools.create_index("name")
-        await mcp_tools.create_index("is_enabled")
-        print("   ✓ mcp_tools")
-        
-        # =============================================
-        # 知识库与技能
-        # =============================================
-        
-        # knowledge_bases collection - 知识库
-        kb = self.db["knowledge_bases"]
-        await kb.create_index("id", unique=True)
-        await kb.create_index("name")
-        await kb.create_index("category")
-        await kb.create_index("created_at")
-        print("   ✓ knowledge_bases")
-        
-        # skills collection - 技能
-        skills = self.db["skills"]
-        await skills.create_index("id", unique=True)
-        await skills.create_index("name")
-        await skills.create_index("category")
-        await skills.create_index("is_active")
-        print("   ✓ skills")
-        
-        # =============================================
-        # 文件与任务
-        # =============================================
-        
-        # files collection - 文件存储
-        files = self.db["files"]
-        await files.create_index("id", unique=True)
-        await files.create_index("filename")
-        await files.create_index("user_id")
-        await files.create_index("created_at")
-        print("   ✓ files")
-        
-        # ocr_tasks collection - OCR 任务
-        ocr = self.db["ocr_tasks"]
-        await ocr.create_index("id", unique=True)
-        await ocr.create_index("file_id")
-        await ocr.create_index("status")
-        await ocr.create_index("created_at")
-        print("   ✓ ocr_tasks")
-        
-        # playground_sessions collection - Playground 会话
-        playground = self.db["playground_sessions"]
-        await playground.create_index("id", unique=True)
-        await playground.create_index("user_id")
-        await playground.create_index("created_at")
-        print("   ✓ playground_sessions")
-        
-        print("\n   ✓ All 18 collections initialized with indexes")
+        reader = pa_csv.open_csv(
+            csv_path,
+            read_options=pa_csv.ReadOptions(
+                column_names=header, skip_rows=1, block_size=CSV_BLOCK_SIZE
+            ),
+            parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={name: pa.string() for name in header},
+                strings_can_be_null=False,
+            ),
+        )
+        for record_batch in reader:
+            # 按列整体转换，避免逐行构造 dict
+            columns = []
+            for name in CSV_COLUMNS:
+                if name in header:
+                    columns.append(record_batch.column(header.index(name)).to_pylist())
+                else:
+                    columns.append(["{}" if name == "features" else ""] * record_batch.num_rows)
+            yield from zip(*columns)
     
-    async def import_documents(self, delivery_records: List[Dict], microbe_records: List[Dict]):
-        """导入文献表 (去重合并)"""
-        print("\n📚 Importing documents...")
+    def parse_csv(self, csv_path: Path, byte_range: Optional[Tuple[int, int]] = None) -> Iterator[CsvRecord]:
+        """逐行解析 CSV 文件（生成器，不在内存中保留整表）"""
+        if self.fast_parse:
+            rows = self._iter_csv_rows_fast(csv_path, byte_range)
+        else:
+            rows = self._iter_csv_rows(csv_path)
+        for paper_id, title, authors, journal, publish_year, features_str in rows:
+            # 解析 features JSON (第6列)
+            try:
+                features = orjson.loads(features_str) if features_str else {}
+            except orjson.JSONDecodeError:
+                features = {}
+            
+            try:
+                year = int(publish_year) if publish_year else 0
+            except ValueError:
+                year = 0
+            
+            yield CsvRecord(paper_id, title, authors, journal, year, features)
+    
+    def _collect_source(
+        self, source: str, csv_path: Path, byte_range: Optional[Tuple[int, int]] = None
+    ) -> Tuple[Dict[str, Dict], Dict[str, Dict], int]:
+        """单次流式遍历一个 CSV（或其中一个字节区间），同时完成文献去重与材料聚合（每行只解析一次）"""
+        papers: Dict[str, Dict] = {}
+        material_map: Dict[str, Dict[str, Any]] = {}
+        count = 0
+        for record in self.parse_csv(csv_path, byte_range):
+            count += 1
+            self._collect_document(papers, record, source, self.import_time)
+            self._collect_biomaterial(material_map, record, source)
+        return papers, material_map, count
+    
+    async def collect_records(self, sources: List[Tuple[str, Path]]) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+        """
+        在独立进程中并行解析各 CSV，再按 sources 顺序合并结果
         
-        # 合并并去重
+        --fast-parse 时每条记录占一行，每个 CSV 再按换行切成 PARSE_CHUNKS 段分给不同进程；
+        csv 模块路径中引号字段可能跨行，只能整文件解析。
+        """
         papers: Dict[str, Dict] = {}
+        material_map: Dict[str, Dict[str, Any]] = {}
+        if not sources:
+            return papers, material_map
         
-        for record in delivery_records:
-            pid = record["paper_id"]
-            if not pid:
-                continue
-            if pid not in papers:
-                papers[pid] = {
-                    "paper_id": pid,
-                    "title": record["title"],
-                    "authors": record["authors"],
-                    "journal": record["journal"],
-                    "publish_year": record["publish_year"],
-                    "source_tables": ["delivery"],
-                    "created_at": datetime.now(),
-                }
+        tasks: List[Tuple[str, Path, Optional[Tuple[int, int]]]] = []
+        for source, csv_path in sources:
+            if self.fast_parse:
+                tasks.extend((source, csv_path, r) for r in self._split_csv(csv_path, PARSE_CHUNKS))
             else:
-                if "delivery" not in papers[pid]["source_tables"]:
-                    papers[pid]["source_tables"].append("delivery")
+                tasks.append((source, csv_path, None))
+        
+        counts = {source: 0 for source, _ in sources}
+        if tasks:
+            # JSON 解码是 CPU 密集型，用进程池绕开 GIL
+            loop = asyncio.get_running_loop()
+            with ProcessPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1)) as pool:
+                results = await asyncio.gather(*(
+                    loop.run_in_executor(pool, self._collect_source, *task)
+                    for task in tasks
+                ))
+            
+            # 按 sources 及文件内区间顺序合并，保证与顺序解析相同的"首次出现优先"语义
+            for (source, _, _), (src_papers, src_materials, count) in zip(tasks, results):
+                counts[source] += count
+                self._merge_papers(papers, src_papers)
+                self._merge_materials(material_map, src_materials)
         
-        for record in microbe_records:
-            pid = record["paper_id"]
-            if not pid:
+        for source, count in counts.items():
+            print(f"   ✓ {source}: parsed {count} rows")
+        
+        return papers, material_map
+    
+    @staticmethod
+    def _merge_papers(papers: Dict[str, Dict], src_papers: Dict[str, Dict]) -> None:
+        for pid, paper in src_papers.items():
+            existing = papers.get(pid)
+            if existing is None:
+                papers[pid] = paper
                 continue
-            if pid not in papers:
-                papers[pid] = {
-                    "paper_id": pid,
-                    "title": record["title"],
-                    "authors": record["authors"],
-                    "journal": record["journal"],
-                    "publish_year": record["publish_year"],
-                    "source_tables": ["microbe"],
-                    "created_at": datetime.now(),
-                }
-            else:
-                if "microbe" not in papers[pid]["source_tables"]:
-                    papers[pid]["source_tables"].append("microbe")
+            existing["source_tables"] |= paper["source_tables"]
+    
+    def _merge_materials(self, material_map: Dict[str, Dict], src_materials: Dict[str, Dict]) -> None:
+        for name, src in src_materials.items():
+            ent = material_map.get(name)
+            if ent is None:
+                material_map[name] = src
+                continue
+            ent["paper_ids"] |= src["paper_ids"]
+            self._merge_functional(ent["functional_performance"], src["functional_performance"])
+            self._merge_functional(ent["biological_impact"], src["biological_impact"])
+            if ent["raw_data"] is None:
+                ent["raw_data"] = src["raw_data"]
+    
+    async def _create_indexes(self, unique: bool):
+        """并发创建 INDEX_SPECS 中唯一索引或非唯一（二级）索引"""
+        if self.dry_run:
+            print("   Skipped (dry run)")
+            return
         
+        async def create_collection_indexes(name: str, specs: List[Tuple[Any, Dict[str, Any]]]):
+            # 每个集合一次 createIndexes 命令，服务端可共用一次集合扫描
+            await self.db[name].create_indexes([
+                IndexModel(keys, **options) for keys, options in specs
+            ])
+            print(f"   ✓ {name}")
+        
+        # 各集合的索引互不依赖，并发创建以避免逐个等待往返
+        tasks = []
+        for name, specs in INDEX_SPECS.items():
+            selected = [(keys, options) for keys, options in specs if options.get("unique", False) == unique]
+            if selected:
+                tasks.append(create_collection_indexes(name, selected))
+        await asyncio.gather(*tasks)
+    
+    async def create_unique_indexes(self):
+        """导入前创建唯一索引，使重复数据在写入时即被拒绝"""
+        print("\n📊 Creating unique indexes...")
+        await self._create_indexes(unique=True)
+    
+    async def create_secondary_indexes(self):
+        """导入完成后再创建二级索引，对已加载数据一次性构建比逐条增量维护更快"""
+        print("\n📊 Creating secondary indexes for all collections...")
+        await self._create_indexes(unique=False)
+        if not self.dry_run:
+            print(f"\n   ✓ All {len(INDEX_SPECS)} collections initialized with indexes")
+    
+    @staticmethod
+    def _collect_document(papers: Dict[str, Dict], record: CsvRecord, source: str, now: datetime) -> None:
+        """按 paper_id 去重合并文献，记录来源表"""
+        pid = record.paper_id
+        if not pid:
+            return
+        entry = papers.get(pid)
+        if entry is None:
+            papers[pid] = {
+                "paper_id": pid,
+                "title": record.title,
+                "authors": record.authors,
+                "journal": record.journal,
+                "publish_year": record.publish_year,
+                "source_tables": {source},
+                "created_at": now,
+            }
+        else:
+            entry["source_tables"].add(source)
+    
+    @staticmethod
+    async def _upsert_all(collection, key: str, docs: Iterable[Dict[str, Any]], total: int):
+        """
+        按唯一键批量 upsert（保留集合及索引，重复运行时 created_at 不变）
+        
+        生产者构建 UpdateOne 批次放入有界队列，WRITE_CONCURRENCY 个消费者
+        并发 bulk_write；等待网络往返期间即可构建下一批。
+        
+        每个文档带 content_hash，过滤条件要求哈希不同：内容未变的文档不会被改写，
+        其 upsert 会撞上 key 的唯一索引（create_unique_indexes 已先行创建），
+        这类重复键错误按"未变化"计数。
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=WRITE_QUEUE_MAXSIZE)
+        written = 0
+        unchanged = 0
+        
+        async def produce():
+            batch = []
+            for doc in docs:
+                fields = {k: v for k, v in doc.items() if k != "created_at"}
+                content_hash = hashlib.blake2b(
+                    orjson.dumps(fields, option=orjson.OPT_SORT_KEYS), digest_size=16
+                ).hexdigest()
+                fields["content_hash"] = content_hash
+                batch.append(UpdateOne(
+                    {key: doc[key], "content_hash": {"$ne": content_hash}},
+                    {
+                        "$set": fields,
+                        "$setOnInsert": {"created_at": doc["created_at"]},
+                    },
+                    upsert=True,
+                ))
+                if len(batch) >= WRITE_BATCH_SIZE:
+                    await queue.put(batch)
+                    batch = []
+            if batch:
+                await queue.put(batch)
+            for _ in range(WRITE_CONCURRENCY):
+                await queue.put(None)
+        
+        async def consume():
+            nonlocal written, unchanged
+            while (batch := await queue.get()) is not None:
+                try:
+                    await collection.bulk_write(batch, ordered=False, bypass_document_validation=True)
+                except BulkWriteError as e:
+                    errors = e.details.get("writeErrors", [])
+                    if any(err.get("code") != DUPLICATE_KEY for err in errors):
+                        raise
+                    unchanged += len(errors)
+                written += len(batch)
+                print(f"   Upserted batch: {written}/{total}")
+        
+        await asyncio.gather(produce(), *(consume() for _ in range(WRITE_CONCURRENCY)))
+        print(f"   Unchanged (skipped): {unchanged}")
+    
+    async def import_documents(self, papers: Dict[str, Dict]):
+        """导入文献表 (去重合并)"""
+        print("\n📚 Importing documents...")
         print(f"   Unique papers: {len(papers)}")
         
+        # 聚合时 source_tables 为 set（O(1) 去重），写入前转换为有序列表
+        for paper in papers.values():
+            paper["source_tables"] = sorted(paper["source_tables"])
+        
         if not self.dry_run and papers:
-            docs_collection = self.db["documents"]
-            await docs_collection.delete_many({})
-            
-            # 批量插入
-            batch_size = 1000
-            paper_list = list(papers.values())
-            for i in range(0, len(paper_list), batch_size):
-                batch = paper_list[i:i + batch_size]
-                await docs_collection.insert_many(batch)
-                print(f"   Inserted batch: {i + len(batch)}/{len(paper_list)}")
+            docs_collection = self.db.get_collection("documents", write_concern=BULK_WRITE_CONCERN)
+            await self._upsert_all(docs_collection, "paper_id", papers.values(), len(papers))
         
         self.stats["documents_total"] = len(papers)
         print(f"   ✓ Imported {len(papers)} documents")
@@ -362,36 +691,49 @@ class DatabaseInitializer:
                     dst[k] = dict(v)
                 continue
             if k not in dst:
-                dst[k] = v
-            elif isinstance(v, str) and isinstance(dst[k], str):
-                dst[k] = dst[k] + "; " + v
+                dst[k] = _TextParts(v) if isinstance(v, _TextParts) else v
+                continue
+            # 字符串片段先累积到列表，写入前再统一拼接，避免反复拼接的 O(N²) 开销
+            if isinstance(v, str):
+                parts = (v,)
+            elif isinstance(v, _TextParts):
+                parts = v
+            else:
+                continue
+            cur = dst[k]
+            if isinstance(cur, _TextParts):
+                cur.extend(parts)
+            elif isinstance(cur, str):
+                dst[k] = _TextParts((cur, *parts))
+    
+    @staticmethod
+    def _finalize_functional(fields: Dict[str, Any]) -> Dict[str, Any]:
+        """将累积的字符串片段以 "; " 拼接为最终值"""
+        return {k: "; ".join(v) if isinstance(v, _TextParts) else v for k, v in fields.items()}
 
-    async def import_biomaterials(self, delivery_records: List[Dict], microbe_records: List[Dict]):
-        """导入生物材料表（按材料名称聚合，一个材料对应多篇论文）"""
-        print("\n🧬 Importing biomaterials (aggregated by name)...")
-        
-        # 按材料名称聚合
-        material_map: Dict[str, Dict[str, Any]] = {}
-        
-        def ensure_material(name: str, category: str, subcategory: str) -> Dict:
-            if name not in material_map:
-                material_map[name] = {
-                    "name": name,
-                    "category": category,
-                    "subcategory": subcategory,
-                    "paper_ids": set(),
-                    "functional_performance": {},
-                    "biological_impact": {},
-                    "raw_data": {},
-                }
-            return material_map[name]
-        
-        # 处理递送系统
-        print("   Processing delivery systems...")
-        for record in delivery_records:
-            features = record.get("features", {})
-            paper_id = record["paper_id"]
-            
+    @staticmethod
+    def _ensure_material(material_map: Dict[str, Dict], name: str, category: str, subcategory: str) -> Dict:
+        if name not in material_map:
+            material_map[name] = {
+                "name": name,
+                "category": category,
+                "subcategory": subcategory,
+                "paper_ids": set(),
+                "functional_performance": {},
+                "biological_impact": {},
+                "raw_data": None,
+            }
+        return material_map[name]
+    
+    def _collect_biomaterial(self, material_map: Dict[str, Dict], record: CsvRecord, source: str) -> None:
+        """按材料名称聚合单行数据（一个材料对应多篇论文）"""
+        features = record.features
+        paper_id = record.paper_id
+        # 热循环中使用的方法预先绑定为局部变量
+        ensure_material = self._ensure_material
+        merge_functional = self._merge_functional
+        
+        if source == "delivery":
             # 从 assemblies 中提取材料
             for asm in features.get("assemblies", []):
                 composition = asm.get("composition", {})
@@ -400,22 +742,22 @@ class DatabaseInitializer:
                     continue
                 
                 sub = asm.get("system_category", "unknown")
-                ent = ensure_material(mat_name, "delivery_system", sub)
+                ent = ensure_material(material_map, mat_name, "delivery_system", sub)
                 ent["paper_ids"].add(paper_id)
                 
                 # 合并 functional_performance
                 fp = asm.get("functional_performance", {})
                 if fp:
-                    self._merge_functional(ent["functional_performance"], fp)
+                    merge_functional(ent["functional_performance"], fp)
                 
                 # 合并 biological_impact
                 bio = asm.get("biological_impact_on_host", {})
                 if bio:
-                    self._merge_functional(ent["biological_impact"], bio)
+                    merge_functional(ent["biological_impact"], bio)
                 
-                # 保留第一条的 raw_data
-                if not ent["raw_data"]:
-                    ent["raw_data"] = asm
+                # 保留第一条的 raw_data（仅检索用字段）
+                if ent["raw_data"] is None:
+                    ent["raw_data"] = self._project_raw_data(asm)
             
             # 从 materials 列表提取（如果存在）
             for m in features.get("materials", []):
@@ -424,19 +766,9 @@ class DatabaseInitializer:
                     continue
                 identity = m.get("identity", {})
                 sub = (identity.get("material_type") or "unknown").strip()
-                ent = ensure_material(name, "delivery_system", sub)
+                ent = ensure_material(material_map, name, "delivery_system", sub)
                 ent["paper_ids"].add(paper_id)
-        
-        delivery_count = sum(1 for e in material_map.values() if e["category"] == "delivery_system")
-        self.stats["biomaterials_delivery"] = delivery_count
-        print(f"   Delivery systems: {delivery_count} (aggregated)")
-        
-        # 处理微生物
-        print("   Processing microbes...")
-        for record in microbe_records:
-            features = record.get("features", {})
-            paper_id = record["paper_id"]
-            
+        else:
             for mic in features.get("microbes", []):
                 std_name = (mic.get("standardized_name") or "").strip()
                 if not std_name:
@@ -444,65 +776,83 @@ class DatabaseInitializer:
                 
                 identity = mic.get("identity", {})
                 sub = (identity.get("type") or "unknown").strip()
-                ent = ensure_material(std_name, "microbe", sub)
+                ent = ensure_material(material_map, std_name, "microbe", sub)
                 ent["paper_ids"].add(paper_id)
                 
-                # 保留完整微生物数据作为 raw_data
-                if not ent["raw_data"]:
-                    ent["raw_data"] = dict(mic)
+                # 保留微生物数据中检索用到的字段作为 raw_data
+                if ent["raw_data"] is None:
+                    ent["raw_data"] = self._project_raw_data(mic)
                 
                 # 提取 functionality notes
                 for tm in (mic.get("effector_modules") or {}).get("therapeutic_mechanisms") or []:
                     notes = (tm or {}).get("mechanism_notes")
                     if notes:
-                        self._merge_functional(ent["functional_performance"], {"functionality_notes": notes})
+                        merge_functional(ent["functional_performance"], {"functionality_notes": notes})
+
+    @staticmethod
+    def _project_raw_data(raw: Dict[str, Any]) -> Dict[str, Any]:
+        """从原始 assembly / microbe 数据中只保留 RAW_DATA_FIELDS 路径"""
+        projected: Dict[str, Any] = {}
+        for path in RAW_DATA_FIELDS:
+            value: Any = raw
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+            if value is None:
+                continue
+            node = projected
+            for key in path[:-1]:
+                node = node.setdefault(key, {})
+            node[path[-1]] = value
+        return projected
+
+    async def import_biomaterials(self, material_map: Dict[str, Dict[str, Any]], papers: Dict[str, Dict]):
+        """导入生物材料表（按材料名称聚合，一个材料对应多篇论文）"""
+        print("\n🧬 Importing biomaterials (aggregated by name)...")
+        
+        delivery_count = sum(1 for e in material_map.values() if e["category"] == "delivery_system")
+        self.stats["biomaterials_delivery"] = delivery_count
+        print(f"   Delivery systems: {delivery_count} (aggregated)")
         
         microbe_count = sum(1 for e in material_map.values() if e["category"] == "microbe")
         self.stats["biomaterials_microbe"] = microbe_count
         print(f"   Microbes: {microbe_count} (aggregated)")
         
-        # 构建文献 ID → 标题 映射
-        paper_title_map = {}
-        for record in delivery_records + microbe_records:
-            pid = record.get("paper_id", "")
-            if pid and pid not in paper_title_map:
-                paper_title_map[pid] = record.get("title", "")
+        # 写入数据库：按需逐条生成写入文档，不构建完整列表
+        if not self.dry_run and material_map:
+            bio_collection = self.db.get_collection("biomaterials", write_concern=BULK_WRITE_CONCERN)
+            await self._upsert_all(
+                bio_collection, "name",
+                self._iter_biomaterial_docs(material_map, papers),
+                len(material_map),
+            )
         
-        # 转换为写入格式
-        biomaterials = []
+        total = len(material_map)
+        multi_paper = sum(1 for e in material_map.values() if len(e["paper_ids"]) > 1)
+        print(f"   ✓ Imported {total} biomaterials (aggregated)")
+        print(f"     - {multi_paper} materials linked to multiple papers")
+    
+    def _iter_biomaterial_docs(
+        self, material_map: Dict[str, Dict[str, Any]], papers: Dict[str, Dict]
+    ) -> Iterator[Dict[str, Any]]:
+        """将聚合结果逐条转换为写入格式（标题直接取自去重后的文献，其中保留了首次出现的标题）"""
+        get_paper = papers.get
         for name, ent in material_map.items():
-            paper_list = list(ent["paper_ids"])
-            paper_titles = [paper_title_map.get(pid, "") for pid in paper_list]
+            # 排序使 paper_ids 顺序稳定，content_hash 才能在多次运行间保持一致
+            paper_list = sorted(ent["paper_ids"])
+            paper_titles = [(get_paper(pid) or {}).get("title", "") for pid in paper_list]
             
-            biomaterials.append({
+            yield {
                 "name": name,
                 "category": ent["category"],
                 "subcategory": ent["subcategory"],
                 "paper_ids": paper_list,
                 "paper_count": len(paper_list),
                 "paper_titles": paper_titles,
-                "functional_performance": ent["functional_performance"],
-                "biological_impact": ent["biological_impact"],
-                "raw_data": ent["raw_data"],
-                "created_at": datetime.now(),
-            })
-        
-        # 写入数据库
-        if not self.dry_run and biomaterials:
-            bio_collection = self.db["biomaterials"]
-            await bio_collection.delete_many({})
-            
-            batch_size = 1000
-            for i in range(0, len(biomaterials), batch_size):
-                batch = biomaterials[i:i + batch_size]
-                await bio_collection.insert_many(batch)
-                print(f"   Inserted batch: {i + len(batch)}/{len(biomaterials)}")
-        
-        total = len(material_map)
-        multi_paper = sum(1 for b in biomaterials if b["paper_count"] > 1)
-        print(f"   ✓ Imported {total} biomaterials (aggregated)")
-        print(f"     - {multi_paper} materials linked to multiple papers")
-        return biomaterials
+                "functional_performance": self._finalize_functional(ent["functional_performance"]),
+                "biological_impact": self._finalize_functional(ent["biological_impact"]),
+                "raw_data": ent["raw_data"] or {},
+                "created_at": self.import_time,
+            }
     
     async def create_default_admin(self):
         """创建默认管理员用户"""
@@ -512,9 +862,6 @@ class DatabaseInitializer:
             print("   Skipped (dry run)")
             return
         
-        from passlib.context import CryptContext
-        pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-        
         users = self.db["users"]
         existing = await users.find_one({"username": "admin"})
         
@@ -522,15 +869,18 @@ class DatabaseInitializer:
             print("   Admin user already exists, skipping")
             return
         
+        # bcrypt 哈希为 CPU 密集型，放到线程中执行，不阻塞事件循环
+        hashed_password = await asyncio.to_thread(pwd_context.hash, "admin123")
+        
         admin_user = {
             "id": "admin-001",
             "username": "admin",
             "email": "admin@example.com",
-            "hashed_password": pwd_context.hash("admin123"),
+            "hashed_password": hashed_password,
             "full_name": "系统管理员",
             "role": "admin",
             "is_active": True,
-            "created_at": datetime.now(),
+            "created_at": self.import_time,
         }
         
         await users.insert_one(admin_user)
@@ -549,34 +899,37 @@ class DatabaseInitializer:
         
         # 检查 CSV 文件
         print("📁 Checking data files...")
+        sources: List[Tuple[str, Path]] = []
         if not DELIVERY_CSV.exists():
             print(f"   ⚠️  Delivery CSV not found: {DELIVERY_CSV}")
             print("   Skipping delivery data import")
-            delivery_records = []
         else:
             print(f"   ✓ Delivery CSV: {DELIVERY_CSV.stat().st_size / (1024*1024):.1f} MB")
-            delivery_records = self.parse_csv(DELIVERY_CSV)
-            print(f"     Parsed: {len(delivery_records)} rows")
+            sources.append(("delivery", DELIVERY_CSV))
         
         if not MICROBE_CSV.exists():
             print(f"   ⚠️  Microbe CSV not found: {MICROBE_CSV}")
             print("   Skipping microbe data import")
-            microbe_records = []
         else:
             print(f"   ✓ Microbe CSV: {MICROBE_CSV.stat().st_size / (1024*1024):.1f} MB")
-            microbe_records = self.parse_csv(MICROBE_CSV)
-            print(f"     Parsed: {len(microbe_records)} rows")
+            sources.append(("microbe", MICROBE_CSV))
+        
+        # 流式解析：每个 CSV 只遍历一次，内存中只保留去重后的文献与聚合后的材料；两个 CSV 并行解析
+        papers, material_map = await self.collect_records(sources)
         
         await self.connect()
         
         try:
+            # 唯一索引先于导入创建
+            await self.create_unique_indexes()
+            
             # 导入数据
-            if delivery_records or microbe_records:
-                await self.import_documents(delivery_records, microbe_records)
-                await self.import_biomaterials(delivery_records, microbe_records)
+            if sources:
+                await self.import_documents(papers)
+                await self.import_biomaterials(material_map, papers)
             
-            # 创建索引
-            await self.create_indexes()
+            # 二级索引在导入后创建
+            await self.create_secondary_indexes()
             
             # 创建默认管理员
             await self.create_default_admin()
@@ -607,9 +960,17 @@ async def main():
         action="store_true",
         help="Parse files and show statistics without importing"
     )
+    parser.add_argument(
+        "--fast-parse",
+        action="store_true",
+        help="Split lines on the first five commas via mmap instead of a CSV parser "
+             "(only for the standard export with one record per line)"
+    )
     args = parser.parse_args()
     
-    initializer = DatabaseInitializer(MONGODB_URL, DATABASE_NAME, dry_run=args.dry_run)
+    initializer = DatabaseInitializer(
+        MONGODB_URL, DATABASE_NAME, dry_run=args.dry_run, fast_parse=args.fast_parse
+    )
     await initializer.run()
 
 
@@ -23,6 +23,9 @@ except Exception:
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 MONGODB_DB_NAME = os.getenv("MONGODB_DB_NAME", os.getenv("MONGODB_DB", "biomedical_platform"))
 
+# 每个集合随机采样的文档数
+SAMPLE_SIZE = 200
+
 
 def get_type_name(val):
     if val is None:
@@ -45,28 +48,86 @@ def get_type_name(val):
 
 
 def collect_keys(doc, prefix="", result=None, types=None):
+    """
+    收集文档中的全部字段路径及其类型
+
+    用显式栈迭代遍历嵌套对象，避免逐层递归调用；对象数组只取前两个元素。
+    """
     if result is None:
         result = set()
     if types is None:
-        types = defaultdict(set)
-    if doc is None:
-        return result, types
-    if not isinstance(doc, dict):
-        return result, types
-    for k, v in doc.items():
-        if k == "_id":
+        types = {}
+    add_key = result.add
+    types_get = types.get
+    stack = [(prefix, doc)]
+    while stack:
+        prefix, node = stack.pop()
+        if not isinstance(node, dict):
             continue
-        key = f"{prefix}.{k}" if prefix else k
-        result.add(key)
-        types[key].add(get_type_name(v))
-        if isinstance(v, dict):
-            collect_keys(v, key, result, types)
-        elif isinstance(v, list) and len(v) > 0 and isinstance(v[0], dict):
-            for i, item in enumerate(v[:2]):
-                collect_keys(item, f"{key}[]", result, types)
+        for k, v in node.items():
+            if k == "_id":
+                continue
+            key = prefix + "." + k if prefix else k
+            add_key(key)
+            type_name = get_type_name(v)
+            key_types = types_get(key)
+            if key_types is None:
+                types[key] = {type_name}
+            else:
+                key_types.add(type_name)
+            if type_name == "object":
+                stack.append((key, v))
+            elif type_name == "array" and v and isinstance(v[0], dict):
+                item_prefix = key + "[]"
+                for item in v[:2]:
+                    stack.append((item_prefix, item))
     return result, types
 
 
+async def inspect_collection(col, cname):
+    """采样单个集合并返回其字段结构报告文本"""
+    # 读取集合元数据中的文档数，无需 count_documents 的全集合扫描
+    total = await col.estimated_document_count()
+    # $sample 随机采样，避免只看到最早插入的一批文档；
+    # batchSize 与采样数一致，一次往返取回全部样本（默认首批只有 101 条）
+    cursor = col.aggregate([{"$sample": {"size": SAMPLE_SIZE}}], batchSize=SAMPLE_SIZE)
+    all_keys = set()
+    key_types = defaultdict(set)
+    sample = {}
+    n = 0
+    async for doc in cursor:
+        n += 1
+        keys, kt = collect_keys(doc)
+        all_keys.update(keys)
+        for k, ts in kt.items():
+            key_types[k].update(ts)
+        if n == 1:
+            # 只保留第一条的样例（去掉 _id 便于阅读）
+            sample = {k: v for k, v in doc.items() if k != "_id"}
+            if isinstance(sample.get("messages"), list) and len(sample["messages"]) > 3:
+                sample["messages"] = sample["messages"][:2] + [f"... 共 {len(doc.get('messages', []))} 条"]
+            if isinstance(sample.get("paper_ids"), list) and len(sample["paper_ids"]) > 5:
+                sample["paper_ids"] = sample["paper_ids"][:3] + [f"... 共 {len(doc.get('paper_ids', []))} 条"]
+
+    # 排序输出字段
+    key_list = sorted(all_keys, key=lambda x: (x.count("."), x))
+
+    lines = [f"\n【{cname}】  文档数: {total}  采样: {n}", "-" * 50]
+    for k in key_list:
+        ts = key_types.get(k, set())
+        type_str = " | ".join(sorted(ts)) if ts else "?"
+        lines.append(f"  {k:<40}  {type_str}")
+    if sample:
+        lines.append("  样例(首条, 部分字段):")
+        for k, v in list(sample.items())[:12]:
+            vstr = str(v)
+            if len(vstr) > 60:
+                vstr = vstr[:57] + "..."
+            lines.append(f"    {k}: {vstr}")
+    lines.append("")
+    return "\n".join(lines)
+
+
 async def main():
     from motor.motor_asyncio import AsyncIOMotorClient
 
@@ -87,45 +148,10 @@ async def main():
     print(f"集合数: {len(names)}")
     print("=" * 60)
 
-    for cname in names:
-        col = db[cname]
-        total = await col.count_documents({})
-        cursor = col.find({}).limit(200)
-        all_keys = set()
-        key_types = defaultdict(set)
-        sample = {}
-        n = 0
-        async for doc in cursor:
-            n += 1
-            keys, kt = collect_keys(doc, result=set(), types=defaultdict(set))
-            all_keys.update(keys)
-            for k, ts in kt.items():
-                key_types[k].update(ts)
-            if n == 1:
-                # 只保留第一条的样例（去掉 _id 便于阅读）
-                sample = {k: v for k, v in doc.items() if k != "_id"}
-                if isinstance(sample.get("messages"), list) and len(sample["messages"]) > 3:
-                    sample["messages"] = sample["messages"][:2] + [f"... 共 {len(doc.get('messages', []))} 条"]
-                if isinstance(sample.get("paper_ids"), list) and len(sample["paper_ids"]) > 5:
-                    sample["paper_ids"] = sample["paper_ids"][:3] + [f"... 共 {len(doc.get('paper_ids', []))} 条"]
-
-        # 排序输出字段
-        key_list = sorted(all_keys, key=lambda x: (x.count("."), x))
-
-        print(f"\n【{cname}】  文档数: {total}  采样: {n}")
-        print("-" * 50)
-        for k in key_list:
-            ts = key_types.get(k, set())
-            type_str = " | ".join(sorted(ts)) if ts else "?"
-            print(f"  {k:<40}  {type_str}")
-        if sample:
-            print("  样例(首条, 部分字段):")
-            for k, v in list(sample.items())[:12]:
-                vstr = str(v)
-                if len(vstr) > 60:
-                    vstr = vstr[:57] + "..."
-                print(f"    {k}: {vstr}")
-        print()
+    # 各集合相互独立，并发检查；按集合名顺序输出
+    reports = await asyncio.gather(*(inspect_collection(db[cname], cname) for cname in names))
+    for report in reports:
+        print(report)
 
     client.close()
     print("=" * 60)
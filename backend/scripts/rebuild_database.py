@@ -5,16 +5,27 @@
 """
 
 import csv
-import json
 import asyncio
+import random
 import httpx
-from datetime import datetime
-from typing import Optional, Dict, List, Any, Tuple
+import orjson
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from collections import deque
+from typing import Optional, Callable, Deque, Dict, Iterable, Iterator, List, Any, Tuple
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.write_concern import WriteConcern
 from pathlib import Path
 import os
 from dotenv import load_dotenv
 
+# 可选：pyarrow 的 C++ CSV 解析器 (pip install pyarrow)
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = pa_csv = None
+
 load_dotenv()
 
 # =============================================
@@ -30,17 +41,102 @@ MICROBE_CSV = Path(__file__).parent.parent.parent / "微生物提取_export_2026
 # Markdown API
 MARKDOWN_API_BASE = os.getenv("MARKDOWN_API_BASE", "http://localhost:8001/api/v1/bioextract/papers")
 
-# 并发控制
-CONCURRENT_LIMIT = 10
+# 并发控制：HEAD 请求经 HTTP/2 在少量长连接上多路复用，并发数不再受握手开销限制
+CONCURRENT_LIMIT = 64
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE = 50
+# 上游返回 429 时并发上限减半，退避后重试，最多尝试次数
+MD_CHECK_MAX_ATTEMPTS = 3
+# 429 退避：基准秒数（按尝试次数指数增长并加随机抖动）与上限；Retry-After 优先
+MD_CHECK_BACKOFF_BASE = 0.5
+MD_CHECK_BACKOFF_MAX = 30.0
+
+# 每批写入的文档数
+INSERT_BATCH_SIZE = 1000
+
+# MongoDB 连接池大小
+MONGO_MAX_POOL_SIZE = 32
+MONGO_MIN_POOL_SIZE = 4
+
+# pyarrow 每次读取的块大小
+CSV_BLOCK_SIZE = 8 << 20
+
+# sync_and_aggregate.py 的增量同步指纹集合
+SYNC_STATE_COLLECTION = "_sync_state"
+
+
+class AdmissionController:
+    """
+    可在运行中调整上限的并发闸门
+    
+    asyncio.Semaphore 的容量创建后无法安全修改，这里用计数器 + Condition 实现，
+    set_limit 可随时收紧或放宽上限。record_success 在限流后逐步恢复上限
+    （每累计 limit 次成功 +1，直到初始值）。
+    """
+    
+    def __init__(self, limit: int):
+        self._limit = limit
+        self._max_limit = limit
+        self._successes = 0
+        self._active = 0
+        self._cond = asyncio.Condition()
+    
+    @property
+    def limit(self) -> int:
+        return self._limit
+    
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._active < self._limit)
+            self._active += 1
+    
+    async def release(self):
+        async with self._cond:
+            self._active -= 1
+            self._cond.notify(1)
+    
+    async def set_limit(self, limit: int):
+        async with self._cond:
+            self._limit = max(1, limit)
+            self._successes = 0
+            self._cond.notify_all()
+    
+    async def record_success(self):
+        if self._limit >= self._max_limit:
+            return
+        async with self._cond:
+            self._successes += 1
+            if self._successes >= self._limit:
+                self._limit = min(self._max_limit, self._limit + 1)
+                self._successes = 0
+                self._cond.notify(1)
+    
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.release()
 
 
 class DatabaseRebuilder:
-    def __init__(self, dry_run: bool = False, skip_md_check: bool = False):
+    def __init__(
+        self,
+        dry_run: bool = False,
+        skip_md_check: bool = False,
+        batch_size: int = INSERT_BATCH_SIZE,
+        fast_reload: bool = False,
+    ):
         self.dry_run = dry_run
         self.skip_md_check = skip_md_check
+        self.batch_size = batch_size
+        self.fast_reload = fast_reload
+        # 本次重建的统一时间戳，所有记录的 created_at 共用
+        self.import_time = datetime.now()
         self.client: AsyncIOMotorClient = None
         self.db = None
         self.http_client: httpx.AsyncClient = None
+        self.admission = AdmissionController(CONCURRENT_LIMIT)
         
         # 统计
         self.stats = {
@@ -51,11 +147,27 @@ class DatabaseRebuilder:
         }
     
     async def connect(self):
-        """连接数据库和 HTTP 客户端"""
-        self.client = AsyncIOMotorClient(MONGODB_URL)
-        self.db = self.client[DATABASE_NAME]
-        self.http_client = httpx.AsyncClient(timeout=30.0)
-        print(f"Connected to MongoDB: {MONGODB_URL}/{DATABASE_NAME}")
+        """连接数据库和 HTTP 客户端（dry run 不写库、跳过 Markdown 检查时不发请求，对应客户端不创建）"""
+        if not self.dry_run:
+            # 并发写入的批次数有限，连接池按此收紧；raw_data 体积大，启用线路压缩
+            # （不可用的压缩器会被驱动自动跳过）
+            self.client = AsyncIOMotorClient(
+                MONGODB_URL,
+                maxPoolSize=MONGO_MAX_POOL_SIZE,
+                minPoolSize=MONGO_MIN_POOL_SIZE,
+                compressors="zstd,snappy,zlib",
+            )
+            self.db = self.client[DATABASE_NAME]
+            print(f"Connected to MongoDB: {MONGODB_URL}/{DATABASE_NAME}")
+        if not self.skip_md_check:
+            self.http_client = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                ),
+                timeout=httpx.Timeout(10.0, connect=5.0),
+            )
     
     async def close(self):
         """关闭连接"""
@@ -66,106 +178,306 @@ class DatabaseRebuilder:
     
     async def check_markdown_exists(self, paper_id: str) -> Tuple[bool, str]:
         """
-        检查论文 Markdown 是否存在
+        检查论文 Markdown 是否存在（受 self.admission 限流，遇 429 收紧并发并退避后重试）
         返回: (exists, url)
         """
         url = f"{MARKDOWN_API_BASE}/{paper_id}/markdown"
-        try:
-            response = await self.http_client.head(url)
-            if response.status_code == 200:
-                return True, url
-            return False, url
-        except Exception:
-            return False, url
+        for attempt in range(MD_CHECK_MAX_ATTEMPTS):
+            try:
+                async with self.admission:
+                    response = await self.http_client.head(url)
+            except Exception:
+                return False, url
+            if response.status_code != 429:
+                await self.admission.record_success()
+                return response.status_code == 200, url
+            await self.admission.set_limit(self.admission.limit // 2)
+            if attempt + 1 < MD_CHECK_MAX_ATTEMPTS:
+                await asyncio.sleep(self._retry_delay(response, attempt))
+        return False, url
     
-    def parse_csv(self, csv_path: Path) -> List[Dict[str, Any]]:
-        """解析 CSV 文件"""
-        records = []
-        with open(csv_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # 解析 features JSON
-                features_str = row.get('features', '{}')
-                try:
-                    features = json.loads(features_str)
-                except json.JSONDecodeError:
-                    features = {}
-                
-                records.append({
-                    "paper_id": row.get("paper_id", ""),
-                    "title": row.get("title", ""),
-                    "authors": row.get("authors", ""),
-                    "journal": row.get("journal", ""),
-                    "publish_year": int(row.get("publish_year", 0)) if row.get("publish_year", "").isdigit() else 0,
-                    "features": features,
-                })
-        return records
+    @staticmethod
+    def _retry_delay(response: httpx.Response, attempt: int) -> float:
+        """429 后的等待秒数：指数退避加全抖动，且不早于 Retry-After（秒数或 HTTP 日期）"""
+        delay = random.uniform(0, min(MD_CHECK_BACKOFF_MAX, MD_CHECK_BACKOFF_BASE * 2 ** attempt))
+        retry_after = response.headers.get("Retry-After", "").strip()
+        if retry_after.isdigit():
+            wait = float(retry_after)
+        elif retry_after:
+            try:
+                wait = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                wait = 0.0
+        else:
+            wait = 0.0
+        return max(delay, min(wait, MD_CHECK_BACKOFF_MAX))
     
-    async def import_documents(self, delivery_records: List[Dict], microbe_records: List[Dict]):
+    def get_collection(self, name: str):
         """
-        导入文献表 (去重合并)
+        获取批量插入用的集合
+        
+        --fast-reload 时使用 w=0（不等待确认）：整表清空重建可随时从 CSV 重跑，
+        中间状态无需持久化保证，结束时由 run() 统一 fsync 一次。
+        只用于 insert_many：清空和建索引须走已确认的 self.db[name]，否则未确认的删除
+        可能经另一条连接晚于后续插入执行，把刚写入的数据删掉。
         """
-        print("\n📚 Importing documents...")
+        if self.fast_reload:
+            return self.db.get_collection(name, write_concern=WriteConcern(w=0))
+        return self.db[name]
+    
+    async def reset_sync_state(self):
+        """清空后 sync_and_aggregate.py 的增量指纹已失效，删除以使其下次全量写入"""
+        await self.db[SYNC_STATE_COLLECTION].drop()
+
+    async def bulk_insert(self, collection, docs: Iterable[Dict[str, Any]]):
+        """
+        按 batch_size 分批无序写入（单批内的失败不会阻断其余文档）
+        
+        docs 可以是生成器：边生成边写入，写完的批次随即释放。
+        """
+        batch = []
+        for doc in docs:
+            batch.append(doc)
+            if len(batch) >= self.batch_size:
+                await self._write_batch(collection, batch)
+                batch = []
+        if batch:
+            await self._write_batch(collection, batch)
+    
+    @staticmethod
+    async def _write_batch(collection, batch: List[Dict[str, Any]]):
+        # 调用方刚执行过 delete_many({})，键必然是新的：直接走纯插入路径，
+        # 不要改成 upsert（会为每个文档多一次按键查找）
+        await collection.insert_many(
+            batch,
+            ordered=False,
+            # 未确认写入不支持 bypass_document_validation
+            bypass_document_validation=collection.write_concern.acknowledged,
+        )
+    
+    @staticmethod
+    def _iter_csv_rows(csv_path: Path) -> Iterator[Dict[str, str]]:
+        """逐行产出原始字段 dict（优先使用 pyarrow，未安装时回退到 csv 模块）"""
+        if pa_csv is None:
+            with open(csv_path, 'r', encoding='utf-8-sig') as f:
+                yield from csv.DictReader(f)
+            return
+        
+        # 自行读取表头（去掉 BOM），所有列按字符串解析，publish_year 仍由下方统一校验
+        with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+            header = next(csv.reader(f), None)
+        if not header:
+            return
+        
+        reader = pa_csv.open_csv(
+            csv_path,
+            read_options=pa_csv.ReadOptions(
+                column_names=header, skip_rows=1, block_size=CSV_BLOCK_SIZE
+            ),
+            parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={name: pa.string() for name in header},
+                strings_can_be_null=False,
+            ),
+        )
+        for record_batch in reader:
+            yield from record_batch.to_pylist()
+    
+    def iter_csv(self, csv_path: Path) -> Iterator[Dict[str, Any]]:
+        """逐行解析 CSV 文件（生成器，不在内存中保留整表）"""
+        for row in self._iter_csv_rows(csv_path):
+            get = row.get
+            # 解析 features JSON
+            try:
+                features = orjson.loads(get('features', '{}'))
+            except orjson.JSONDecodeError:
+                features = {}
+            
+            publish_year = get("publish_year") or ""
+            yield {
+                "paper_id": get("paper_id", ""),
+                "title": get("title", ""),
+                "authors": get("authors", ""),
+                "journal": get("journal", ""),
+                "publish_year": int(publish_year) if publish_year.isdigit() else 0,
+                "features": features,
+            }
+    
+    def _collect_document(self, papers: Dict[str, Dict], record: Dict[str, Any], source: str):
+        """将一行记录合并进文献表 (按 paper_id 去重；source_tables 在写入前为 set)"""
+        pid = record["paper_id"]
+        entry = papers.get(pid)
+        if entry is None:
+            papers[pid] = {
+                "paper_id": pid,
+                "title": record["title"],
+                "authors": record["authors"],
+                "journal": record["journal"],
+                "publish_year": record["publish_year"],
+                "source_tables": {source},
+                "markdown_url": None,
+                "has_markdown": False,
+                "created_at": self.import_time,
+            }
+        else:
+            entry["source_tables"].add(source)
+    
+    def _collect_delivery(self, materials: Deque[Tuple], seen_ids: set, record: Dict[str, Any]):
+        """从一行递送系统记录中提取材料，记为 (id, paper_id, paper_title, 原始数据)"""
+        features = record.get("features", {})
+        assemblies = features.get("assemblies", [])
+        
+        for asm in assemblies:
+            system_id = asm.get("system_id", "")
+            if not system_id or system_id in seen_ids:
+                continue
+            seen_ids.add(system_id)
+            materials.append((system_id, record["paper_id"], record["title"], asm))
+    
+    def _collect_microbe(self, materials: Deque[Tuple], seen_ids: set, record: Dict[str, Any]):
+        """从一行微生物记录中提取材料，记为 (id, paper_id, paper_title, 原始数据)"""
+        features = record.get("features", {})
+        microbes = features.get("microbes", [])
+        
+        for mic in microbes:
+            std_name = mic.get("standardized_name", "")
+            if not std_name or std_name in seen_ids:
+                continue
+            seen_ids.add(std_name)
+            materials.append((std_name, record["paper_id"], record["title"], mic))
+    
+    def _delivery_doc(self, system_id: str, paper_id: str, paper_title: str, asm: Dict[str, Any]) -> Dict[str, Any]:
+        """构造递送系统的 biomaterials 文档"""
+        composition = asm.get("composition", {})
+        func_perf = asm.get("functional_performance", {})
+        bio_impact = asm.get("biological_impact_on_host", {})
+        
+        return {
+            "id": system_id,
+            "name": composition.get("material_name", system_id),
+            "category": "delivery_system",
+            "subcategory": asm.get("system_category", "unknown"),
+            "paper_id": paper_id,
+            "paper_title": paper_title,
+            "composition": composition,
+            "functional_performance": func_perf,
+            "biological_impact": bio_impact,
+            "payload": composition.get("payload_name"),
+            "loading_mode": composition.get("loading_mode"),
+            "release_kinetics": func_perf.get("release_kinetics"),
+            "raw_data": asm,
+            "created_at": self.import_time,
+        }
+    
+    def _microbe_doc(self, std_name: str, paper_id: str, paper_title: str, mic: Dict[str, Any]) -> Dict[str, Any]:
+        """构造微生物的 biomaterials 文档"""
+        identity = mic.get("identity", {})
+        chassis = mic.get("chassis_and_growth", {})
+        effector = mic.get("effector_modules", {})
+        sensing = mic.get("sensing_modules", {})
+        biosafety = mic.get("biosafety_and_containment", {})
         
-        # 合并并去重
+        return {
+            "id": std_name,
+            "name": std_name,
+            "category": "microbe",
+            "subcategory": identity.get("type", "unknown"),
+            "paper_id": paper_id,
+            "paper_title": paper_title,
+            "identity": identity,
+            "chassis_and_growth": chassis,
+            "effector_modules": effector,
+            "sensing_modules": sensing,
+            "biosafety": biosafety,
+            "genus": identity.get("genus"),
+            "species": identity.get("species"),
+            "strain": identity.get("strain"),
+            "is_engineered": identity.get("is_engineered"),
+            "raw_data": mic,
+            "created_at": self.import_time,
+        }
+    
+    def _iter_biomaterials(self, deliveries: Deque[Tuple], microbes: Deque[Tuple]) -> Iterator[Dict[str, Any]]:
+        """逐条生成 biomaterials 文档；边生成边出队，已写入的原始数据不再被引用"""
+        while deliveries:
+            yield self._delivery_doc(*deliveries.popleft())
+        while microbes:
+            yield self._microbe_doc(*microbes.popleft())
+    
+    def _collect_source(
+        self,
+        csv_path: Path,
+        source: str,
+        collect_materials: Callable[[Deque[Tuple], set, Dict[str, Any]], None],
+    ) -> Tuple[Dict[str, Dict], Deque[Tuple], set, int]:
+        """遍历一个 CSV，同时收集文献和材料，返回 (papers, materials, seen_ids, 行数)"""
         papers: Dict[str, Dict] = {}
+        materials: Deque[Tuple] = deque()
+        seen_ids = set()
+        rows = 0
+        collect_document = self._collect_document
+        for record in self.iter_csv(csv_path):
+            rows += 1
+            collect_document(papers, record, source)
+            collect_materials(materials, seen_ids, record)
+        return papers, materials, seen_ids, rows
+    
+    async def import_all(self, delivery_path: Path, microbe_path: Path):
+        """
+        每个 CSV 只遍历一次，同一趟里同时收集文献和材料，然后分别写入
         
-        for record in delivery_records:
-            pid = record["paper_id"]
-            if pid not in papers:
-                papers[pid] = {
-                    "paper_id": pid,
-                    "title": record["title"],
-                    "authors": record["authors"],
-                    "journal": record["journal"],
-                    "publish_year": record["publish_year"],
-                    "source_tables": ["delivery"],
-                    "markdown_url": None,
-                    "has_markdown": False,
-                    "created_at": datetime.now(),
-                }
-            else:
-                if "delivery" not in papers[pid]["source_tables"]:
-                    papers[pid]["source_tables"].append("delivery")
+        两个 CSV 在工作线程中并发解析，不阻塞事件循环；结果按文件顺序合并，
+        与先递送系统、后微生物的顺序解析结果一致。
+        """
+        print("📖 Parsing CSV files...")
+        (papers, deliveries, delivery_ids, delivery_rows), (microbe_papers, microbes, _, microbe_rows) = (
+            await asyncio.gather(
+                asyncio.to_thread(self._collect_source, delivery_path, "delivery", self._collect_delivery),
+                asyncio.to_thread(self._collect_source, microbe_path, "microbe", self._collect_microbe),
+            )
+        )
+        print(f"   Delivery: {delivery_rows} rows")
+        print(f"   Microbe: {microbe_rows} rows")
         
-        for record in microbe_records:
-            pid = record["paper_id"]
-            if pid not in papers:
-                papers[pid] = {
-                    "paper_id": pid,
-                    "title": record["title"],
-                    "authors": record["authors"],
-                    "journal": record["journal"],
-                    "publish_year": record["publish_year"],
-                    "source_tables": ["microbe"],
-                    "markdown_url": None,
-                    "has_markdown": False,
-                    "created_at": datetime.now(),
-                }
+        # 文献保留首次出现的记录，只合并来源
+        for pid, paper in microbe_papers.items():
+            entry = papers.get(pid)
+            if entry is None:
+                papers[pid] = paper
             else:
-                if "microbe" not in papers[pid]["source_tables"]:
-                    papers[pid]["source_tables"].append("microbe")
+                entry["source_tables"] |= paper["source_tables"]
         
+        # id 已被递送系统占用的微生物跳过
+        microbes = deque(mic for mic in microbes if mic[0] not in delivery_ids)
+        self.stats["biomaterials_delivery"] = len(deliveries)
+        self.stats["biomaterials_microbe"] = len(microbes)
+        
+        # 文献与材料写入互不相关的集合，并发导入
+        await asyncio.gather(
+            self.import_documents(papers),
+            self.import_biomaterials(deliveries, microbes),
+        )
+    
+    async def import_documents(self, papers: Dict[str, Dict]):
+        """
+        导入文献表 (去重合并)
+        """
+        print("\n📚 Importing documents...")
         print(f"   Unique papers: {len(papers)}")
         
         # 批量检查 Markdown 可用性 (可选跳过)
         if self.skip_md_check:
             print("   Skipping Markdown check (--skip-md-check)")
-            # 设置默认 URL 模板
-            for pid in papers:
-                papers[pid]["markdown_url"] = f"{MARKDOWN_API_BASE}/{pid}/markdown"
+            # 设置默认 URL 模板（前缀只拼接一次）
+            base = MARKDOWN_API_BASE + "/"
+            for pid, paper in papers.items():
+                paper["markdown_url"] = base + pid + "/markdown"
         else:
             print("   Checking Markdown availability...")
-            semaphore = asyncio.Semaphore(CONCURRENT_LIMIT)
-            
-            async def check_with_limit(paper_id: str):
-                async with semaphore:
-                    return paper_id, await self.check_markdown_exists(paper_id)
+            pids = list(papers.keys())
+            results = await asyncio.gather(*(self.check_markdown_exists(pid) for pid in pids))
             
-            tasks = [check_with_limit(pid) for pid in papers.keys()]
-            results = await asyncio.gather(*tasks)
-            
-            for pid, (has_md, md_url) in results:
+            for pid, (has_md, md_url) in zip(pids, results):
                 papers[pid]["has_markdown"] = has_md
                 papers[pid]["markdown_url"] = md_url if has_md else None
                 if has_md:
@@ -175,123 +487,53 @@ class DatabaseRebuilder:
         
         # 写入数据库
         if not self.dry_run:
+            # 清空与建索引必须确认完成后再写入，只有插入走 get_collection
             docs_collection = self.db["documents"]
             await docs_collection.delete_many({})  # 清空
+            await self.reset_sync_state()
             if papers:
-                await docs_collection.insert_many(list(papers.values()))
-                # 创建索引
-                await docs_collection.create_index("paper_id", unique=True)
-                await docs_collection.create_index("source_tables")
-                await docs_collection.create_index("has_markdown")
+                # set 转为列表写入；排序结果 (delivery, microbe) 与按文件顺序追加时一致
+                for paper in papers.values():
+                    paper["source_tables"] = sorted(paper["source_tables"])
+                # 先在空集合上创建索引，写入时随插入增量维护，省去写入后再扫描全表建索引
+                await asyncio.gather(
+                    docs_collection.create_index("paper_id", unique=True),
+                    docs_collection.create_index("source_tables"),
+                    docs_collection.create_index("has_markdown"),
+                )
+                await self.bulk_insert(self.get_collection("documents"), papers.values())
         
         self.stats["documents_total"] = len(papers)
         print(f"   ✅ Imported {len(papers)} documents")
         
         return papers
     
-    async def import_biomaterials(self, delivery_records: List[Dict], microbe_records: List[Dict]):
+    async def import_biomaterials(self, deliveries: Deque[Tuple], microbes: Deque[Tuple]):
         """
-        导入生物材料表 (按来源分类)
+        导入生物材料表 (按来源分类；文档由生成器逐批构造并写入)
         """
+        total = len(deliveries) + len(microbes)
         print("\n🧬 Importing biomaterials...")
-        
-        biomaterials = []
-        seen_ids = set()
-        
-        # 处理递送系统
-        print("   Processing delivery systems...")
-        for record in delivery_records:
-            features = record.get("features", {})
-            assemblies = features.get("assemblies", [])
-            
-            for asm in assemblies:
-                system_id = asm.get("system_id", "")
-                if not system_id or system_id in seen_ids:
-                    continue
-                seen_ids.add(system_id)
-                
-                composition = asm.get("composition", {})
-                func_perf = asm.get("functional_performance", {})
-                bio_impact = asm.get("biological_impact_on_host", {})
-                
-                biomaterials.append({
-                    "id": system_id,
-                    "name": composition.get("material_name", system_id),
-                    "category": "delivery_system",
-                    "subcategory": asm.get("system_category", "unknown"),
-                    "paper_id": record["paper_id"],
-                    "paper_title": record["title"],
-                    "composition": composition,
-                    "functional_performance": func_perf,
-                    "biological_impact": bio_impact,
-                    "payload": composition.get("payload_name"),
-                    "loading_mode": composition.get("loading_mode"),
-                    "release_kinetics": func_perf.get("release_kinetics"),
-                    "raw_data": asm,
-                    "created_at": datetime.now(),
-                })
-        
-        self.stats["biomaterials_delivery"] = len(biomaterials)
-        print(f"   Delivery systems: {len(biomaterials)}")
-        
-        # 处理微生物
-        print("   Processing microbes...")
-        microbe_count = 0
-        for record in microbe_records:
-            features = record.get("features", {})
-            microbes = features.get("microbes", [])
-            
-            for mic in microbes:
-                identity = mic.get("identity", {})
-                std_name = mic.get("standardized_name", "")
-                if not std_name or std_name in seen_ids:
-                    continue
-                seen_ids.add(std_name)
-                
-                chassis = mic.get("chassis_and_growth", {})
-                effector = mic.get("effector_modules", {})
-                sensing = mic.get("sensing_modules", {})
-                biosafety = mic.get("biosafety_and_containment", {})
-                
-                biomaterials.append({
-                    "id": std_name,
-                    "name": std_name,
-                    "category": "microbe",
-                    "subcategory": identity.get("type", "unknown"),
-                    "paper_id": record["paper_id"],
-                    "paper_title": record["title"],
-                    "identity": identity,
-                    "chassis_and_growth": chassis,
-                    "effector_modules": effector,
-                    "sensing_modules": sensing,
-                    "biosafety": biosafety,
-                    "genus": identity.get("genus"),
-                    "species": identity.get("species"),
-                    "strain": identity.get("strain"),
-                    "is_engineered": identity.get("is_engineered"),
-                    "raw_data": mic,
-                    "created_at": datetime.now(),
-                })
-                microbe_count += 1
-        
-        self.stats["biomaterials_microbe"] = microbe_count
-        print(f"   Microbes: {microbe_count}")
+        print(f"   Delivery systems: {self.stats['biomaterials_delivery']}")
+        print(f"   Microbes: {self.stats['biomaterials_microbe']}")
         
         # 写入数据库
         if not self.dry_run:
             bio_collection = self.db["biomaterials"]
             await bio_collection.delete_many({})
-            if biomaterials:
-                await bio_collection.insert_many(biomaterials)
-                # 创建索引
-                await bio_collection.create_index("id", unique=True)
-                await bio_collection.create_index("category")
-                await bio_collection.create_index("subcategory")
-                await bio_collection.create_index("paper_id")
-                await bio_collection.create_index("name")
+            await self.reset_sync_state()
+            if total:
+                # 同上：索引先于写入创建
+                await asyncio.gather(
+                    bio_collection.create_index("id", unique=True),
+                    bio_collection.create_index("category"),
+                    bio_collection.create_index("subcategory"),
+                    bio_collection.create_index("paper_id"),
+                    bio_collection.create_index("name"),
+                )
+                await self.bulk_insert(self.get_collection("biomaterials"), self._iter_biomaterials(deliveries, microbes))
         
-        print(f"   ✅ Imported {len(biomaterials)} biomaterials total")
-        return biomaterials
+        print(f"   ✅ Imported {total} biomaterials total")
     
     async def run(self):
         """执行完整导入流程"""
@@ -314,19 +556,13 @@ class DatabaseRebuilder:
         await self.connect()
         
         try:
-            # 解析 CSV
-            print("📖 Parsing CSV files...")
-            delivery_records = self.parse_csv(DELIVERY_CSV)
-            print(f"   Delivery: {len(delivery_records)} rows")
-            
-            microbe_records = self.parse_csv(MICROBE_CSV)
-            print(f"   Microbe: {len(microbe_records)} rows")
-            
-            # 导入文献
-            await self.import_documents(delivery_records, microbe_records)
+            # 解析 CSV 并导入文献和材料
+            await self.import_all(DELIVERY_CSV, MICROBE_CSV)
             
-            # 导入材料
-            await self.import_biomaterials(delivery_records, microbe_records)
+            if self.fast_reload and not self.dry_run:
+                # w=0 写入结束后强制落盘一次
+                await self.client.admin.command("fsync")
+                print("\n💾 Flushed writes to disk (fsync)")
             
             # 打印统计
             print("\n" + "=" * 60)
@@ -348,9 +584,16 @@ async def main():
     parser = argparse.ArgumentParser(description="Rebuild database from CSV files")
     parser.add_argument("--dry-run", action="store_true", help="Parse only, don't write to database")
     parser.add_argument("--skip-md-check", action="store_true", help="Skip Markdown availability check")
+    parser.add_argument("--batch-size", type=int, default=INSERT_BATCH_SIZE, help="Documents per insert batch")
+    parser.add_argument("--fast-reload", action="store_true", help="Write with w=0 and fsync once at the end")
     args = parser.parse_args()
     
-    rebuilder = DatabaseRebuilder(dry_run=args.dry_run, skip_md_check=args.skip_md_check)
+    rebuilder = DatabaseRebuilder(
+        dry_run=args.dry_run,
+        skip_md_check=args.skip_md_check,
+        batch_size=args.batch_size,
+        fast_reload=args.fast_reload,
+    )
     await rebuilder.run()
 
 
@@ -5,6 +5,7 @@ Pytest 配置和 Fixtures
 import pytest
 import asyncio
 from typing import AsyncGenerator
+from httpx import AsyncClient, ASGITransport
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.core.config import settings
 
@@ -15,6 +16,14 @@ def event_loop():
     yield loop
     loop.close()
 
+@pytest.fixture(scope="session")
+async def client() -> AsyncGenerator[AsyncClient, None]:
+    """整个测试会话共用的 API 客户端（ASGI 传输，不经过网络）"""
+    from app.main import app
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+
 @pytest.fixture
 async def test_db() -> AsyncGenerator:
     """测试数据库 Fixture"""